@@ -0,0 +1,53 @@
+"""Shared setup for the standalone benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database so they never touch
+``db.sqlite3``; call :func:`setup_django` before importing any models.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'blogicum'
+
+
+def setup_django(db_path=None, migrate=True, **overrides):
+    """Configure Django on a temporary database and apply migrations.
+
+    ``overrides`` are set on the settings before Django is set up.
+    """
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp()) / 'bench.sqlite3'
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    django.setup()
+    if migrate:
+        call_command('migrate', verbosity=0)
+    return db_path
+
+
+@contextmanager
+def timer(results, label):
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
+
+
+def explain(queryset):
+    """Return the SQLite query plan of ``queryset`` as a list of lines."""
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
@@ -0,0 +1,161 @@
+"""Simultaneous readers and writers on one SQLite file.
+
+Usage::
+
+    python benchmarks/concurrency.py --readers 4 --writers 4 --duration 10
+
+The script generates a dataset once and copies it for every mode. In
+each mode separate processes hit the views through the test client for
+``--duration`` seconds: readers open the index and post pages, writers
+add comments. ``default`` runs with SQLite defaults (rollback journal,
+deferred transactions), ``tuned`` with the pragmas of ``blog.database``
+and immediate transactions. Throughput, latency percentiles and the
+number of "database is locked" errors are printed per mode and role.
+"""
+import argparse
+import multiprocessing
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from common import setup_django
+
+# Mode -> (BLOG_SQLITE_PRAGMAS, database OPTIONS).
+MODES = {
+    'default': ({}, {}),
+    'tuned': (None, {'transaction_mode': 'IMMEDIATE'}),
+}
+
+
+def worker(mode, db_path, role, seed, barrier, duration, results):
+    pragmas, options = MODES[mode]
+    setup_django(
+        db_path,
+        migrate=False,
+        BLOG_SQLITE_PRAGMAS=pragmas,
+        DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': options,
+        }},
+        BLOG_PAGE_CACHE_TIMEOUT=0,
+        BLOG_TIMING_SAMPLE_RATE=0,
+        ALLOWED_HOSTS=['*'],
+    )
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError
+    from django.test import Client
+
+    from blog.models import Post
+
+    rng = random.Random(seed)
+    post_pks = list(
+        Post.objects.filter_published().values_list('pk', flat=True)
+    )
+    client = Client()
+    if role == 'writer':
+        client.force_login(rng.choice(get_user_model().objects.all()))
+
+    def request():
+        post_pk = rng.choice(post_pks)
+        if role == 'writer':
+            return client.post(
+                f'/posts/{post_pk}/comment/', {'text': 'Комментарий'}
+            )
+        if rng.random() < 0.5:
+            return client.get('/')
+        return client.get(f'/posts/{post_pk}/')
+
+    latencies = []
+    errors = 0
+    barrier.wait()
+    end = time.perf_counter() + duration
+    while (start := time.perf_counter()) < end:
+        try:
+            request()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put((role, latencies, errors))
+
+
+def run_mode(mode, db_path, readers, writers, duration):
+    context = multiprocessing.get_context('spawn')
+    roles = ['reader'] * readers + ['writer'] * writers
+    barrier = context.Barrier(len(roles))
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(
+            mode, db_path, role, seed, barrier, duration, results
+        ))
+        for seed, role in enumerate(roles)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    summary = {}
+    for role in ('reader', 'writer'):
+        latencies = sorted(
+            latency for name, values, _ in collected if name == role
+            for latency in values
+        )
+        if not latencies:
+            continue
+        summary[role] = {
+            'requests/s': round(len(latencies) / duration, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 1),
+            'p95_ms': round(
+                latencies[int(len(latencies) * 0.95)] * 1000, 1
+            ),
+            'errors': sum(
+                errors for name, _, errors in collected if name == role
+            ),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp())
+    template = directory / 'template.sqlite3'
+    # The dataset is built with SQLite defaults, so every copy starts in
+    # the rollback journal mode.
+    setup_django(template, BLOG_SQLITE_PRAGMAS={})
+    from django.db import connections
+
+    from blog.generator import generate
+
+    generate(
+        posts=args.posts, users=max(1, args.posts // 50),
+        comments=args.posts * 4, seed=args.seed
+    )
+    connections.close_all()
+
+    columns = ('requests/s', 'p50_ms', 'p95_ms', 'errors')
+    print(f'{"mode":<18}' + ''.join(f'{column:>12}' for column in columns))
+    for mode in MODES:
+        db_path = directory / f'{mode}.sqlite3'
+        shutil.copy(template, db_path)
+        summary = run_mode(
+            mode, db_path, args.readers, args.writers, args.duration
+        )
+        for role, metrics in summary.items():
+            print(f'{f"{mode} {role}s":<18}' + ''.join(
+                f'{metrics[column]:>12}' for column in columns
+            ))
+
+
+if __name__ == '__main__':
+    main()
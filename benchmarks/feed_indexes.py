@@ -0,0 +1,116 @@
+"""Query plans and timings of the feed queries with and without indexes.
+
+Usage::
+
+    python benchmarks/feed_indexes.py --posts 300000
+
+The script fills a temporary database, prints ``EXPLAIN QUERY PLAN`` and
+the time to fetch the first and a deep page of ``index``,
+``category_posts`` and ``profile``, then drops the feed indexes and
+repeats the measurements.
+"""
+import argparse
+import random
+from datetime import timedelta
+
+from common import explain, setup_django, timer
+
+FEED_INDEXES = (
+    'category_is_published_idx',
+    'post_published_pub_date_idx',
+    'post_category_pub_date_idx',
+    'post_author_pub_date_idx',
+)
+
+
+def populate(n_posts, n_authors=200, n_categories=20, batch_size=5000):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from blog.models import Category, Post
+
+    User = get_user_model()
+    authors = User.objects.bulk_create(
+        User(username=f'author{i}') for i in range(n_authors)
+    )
+    categories = Category.objects.bulk_create(
+        Category(
+            title=f'Категория {i}',
+            description='Описание',
+            slug=f'category-{i}',
+            is_published=i % 10 != 0,
+        )
+        for i in range(n_categories)
+    )
+    now = timezone.now()
+    batch = []
+    for i in range(n_posts):
+        batch.append(Post(
+            title=f'Публикация {i}',
+            text='Текст публикации ' * 5,
+            pub_date=now - timedelta(minutes=random.randint(-1000, 10 ** 6)),
+            author=random.choice(authors),
+            category=random.choice(categories),
+            is_published=random.random() > 0.05,
+        ))
+        if len(batch) == batch_size:
+            Post.objects.bulk_create(batch)
+            batch = []
+    Post.objects.bulk_create(batch)
+    return authors[0], categories[1]
+
+
+def feed_querysets(author, category):
+    from blog.models import Post
+
+    return {
+        'index': Post.objects.filter_published().with_relations(),
+        'category_posts': (
+            category.posts.filter_published().with_relations()
+        ),
+        'profile': author.posts.filter_published().with_relations(),
+    }
+
+
+def measure(querysets, per_page=10, deep_page=1000):
+    for name, queryset in querysets.items():
+        print(f'--- {name}')
+        for line in explain(queryset[:per_page]):
+            print(f'    {line}')
+        results = {}
+        with timer(results, 'first page'):
+            list(queryset[:per_page])
+        offset = per_page * deep_page
+        with timer(results, f'page {deep_page}'):
+            list(queryset[offset:offset + per_page])
+        for label, seconds in results.items():
+            print(f'    {label}: {seconds * 1000:.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=300_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    print(f'Populating {args.posts} posts...')
+    author, category = populate(args.posts)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    querysets = feed_querysets(author, category)
+    print('\n=== With feed indexes')
+    measure(querysets)
+
+    with connection.cursor() as cursor:
+        for name in FEED_INDEXES:
+            cursor.execute(f'DROP INDEX {name}')
+        cursor.execute('ANALYZE')
+    print('\n=== Without feed indexes')
+    measure(querysets)
+
+
+if __name__ == '__main__':
+    main()
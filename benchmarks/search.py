@@ -0,0 +1,104 @@
+"""Search backends against the ``LIKE`` baseline on a generated corpus.
+
+Usage::
+
+    python benchmarks/search.py --posts 200000
+
+Posts are bulk inserted (the FTS triggers index them on the way in), then
+every query is run with ``LIKE``, the FTS5 backend and the in-memory
+inverted index, and the time to fetch the first page of results is
+printed along with the build time and size of the inverted index.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from common import setup_django
+
+QUERIES = ('байкал', 'рецепт пирога', 'зим', 'поезд вокзал', 'кофе')
+
+
+def populate(n_posts, batch_size=5000):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from blog.generator import vocabulary
+    from blog.models import Category, Post
+
+    author = get_user_model().objects.create(username='author')
+    category = Category.objects.create(
+        title='Категория', description='Описание', slug='category'
+    )
+    words, weights = vocabulary(random.Random())
+    now = timezone.now()
+    batch = []
+    for i in range(n_posts):
+        batch.append(Post(
+            title=' '.join(random.choices(words, cum_weights=weights, k=4)),
+            text=' '.join(random.choices(words, cum_weights=weights, k=60)),
+            pub_date=now,
+            author=author,
+            category=category,
+        ))
+        if len(batch) == batch_size:
+            Post.objects.bulk_create(batch)
+            batch = []
+    Post.objects.bulk_create(batch)
+
+
+def like_search(posts, query):
+    from django.db.models import Q
+
+    from blog.search import WORD_RE
+
+    condition = Q()
+    for word in WORD_RE.findall(query):
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    return posts.filter(condition).order_by('-pub_date')
+
+
+def measure(search, query, repeat=5):
+    from blog.models import Post
+
+    posts = Post.objects.filter_published().with_relations()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(search(posts, query)[:10])
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=200_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from blog.search import FTS5Backend, InvertedIndexBackend
+
+    print(f'Populating {args.posts} posts...')
+    populate(args.posts)
+    inverted = InvertedIndexBackend()
+    inverted.build()
+    stats = inverted.stats()
+    print(
+        f'Inverted index: {stats["build_seconds"]:.1f} s, '
+        f'{stats["terms"]} terms, {stats["postings"]} postings, '
+        f'{stats["bytes"] / 2 ** 20:.1f} MiB'
+    )
+
+    backends = {
+        'LIKE': like_search,
+        'FTS5': FTS5Backend().search,
+        'inverted': inverted.search,
+    }
+    print(f'{"query, ms":<16}' + ''.join(f'{name:>10}' for name in backends))
+    for query in QUERIES:
+        timings = [measure(search, query) for search in backends.values()]
+        print(f'{query:<16}' + ''.join(f'{ms:>10.1f}' for ms in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""Latency, SQL and memory of the blog views on growing datasets.
+
+Usage::
+
+    python benchmarks/views.py --sizes 1000,10000 --output results.json
+    python benchmarks/views.py --baseline benchmarks/baseline.json
+
+For every dataset size the script tops up a temporary database with
+``blog.generator`` and drives ``index``, ``category_posts``, ``profile``,
+``post_detail``, ``add_comment`` and ``post_create`` through the test
+client with the page cache off. It records p50/p95 latency, SQL query
+count and time, template render time and peak allocated memory. Query
+counts are also taken on a cold request after clearing the cache,
+because the fragment and count caches hide N+1 queries on warm ones.
+
+With ``--baseline`` the results are compared against a stored run and
+the script exits with status 1 when a view makes more queries than in
+the baseline or than on the smallest dataset, or when its median latency
+or peak memory grow by more than ``--tolerance``. Timings vary a lot
+between machines and runs, so the default tolerance only catches gross
+slowdowns; query counts are compared exactly. ``--update-baseline``
+writes the results to the baseline file instead.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from common import setup_django
+
+# Share of the posts count used for the other generated objects.
+DATASET_SHAPE = {
+    'users': 0.02,
+    'categories': 0.001,
+    'locations': 0.002,
+    'comments': 4,
+}
+
+
+class Recorder:
+    """Collect SQL and template render timings of the current request."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self._rendering = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+    @contextmanager
+    def rendering(self):
+        self._rendering += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._rendering -= 1
+            if not self._rendering:
+                self.render_time += time.perf_counter() - start
+
+
+@contextmanager
+def instrument(recorder):
+    from django.db import connection
+    from django.template.backends.django import Template
+
+    render = Template.render
+
+    def timed_render(self, *args, **kwargs):
+        with recorder.rendering():
+            return render(self, *args, **kwargs)
+
+    Template.render = timed_render
+    try:
+        with connection.execute_wrapper(recorder):
+            yield
+    finally:
+        Template.render = render
+
+
+def grow_dataset(posts, seed):
+    """Add generated objects until there are ``posts`` posts."""
+    from blog.generator import generate
+    from blog.models import Post
+
+    missing = posts - Post.objects.count()
+    if missing <= 0:
+        return
+    generate(
+        posts=missing,
+        seed=seed,
+        **{
+            name: max(1, int(missing * share))
+            for name, share in DATASET_SHAPE.items()
+        }
+    )
+
+
+def scenarios(counter):
+    """Return ``{name: callable(client) -> response}`` for the dataset."""
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+    from django.utils import timezone
+
+    from blog.models import Category, Post
+
+    posts = Post.objects.filter_published()
+    category = Category.objects.filter(is_published=True).annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    author = get_user_model().objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    hot_post = posts.order_by('-comment_count').first()
+
+    def post_create(client):
+        counter['posts'] += 1
+        return client.post('/posts/create/', {
+            'title': f'Публикация {counter["posts"]}',
+            'text': 'Текст публикации для замера.',
+            'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'category': category.pk,
+        })
+
+    def add_comment(client):
+        return client.post(
+            f'/posts/{hot_post.pk}/comment/', {'text': 'Комментарий'}
+        )
+
+    return {
+        'index': lambda client: client.get('/'),
+        'category_posts': lambda client: client.get(
+            f'/category/{category.slug}/'
+        ),
+        'profile': lambda client: client.get(
+            f'/profile/{author.username}/'
+        ),
+        'post_detail': lambda client: client.get(f'/posts/{hot_post.pk}/'),
+        'add_comment': add_comment,
+        'post_create': post_create,
+    }, author
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def measure(request, client, repeat):
+    """Run ``request`` ``repeat`` times and return its metrics."""
+    from django.core.cache import cache
+
+    recorder = Recorder()
+    latencies = []
+    queries = sql_time = render_time = 0
+    with instrument(recorder):
+        # Fragment and count caches hide N+1 queries on warm requests.
+        cache.clear()
+        request(client)
+        cold_queries = recorder.queries
+        for _ in range(repeat):
+            recorder.reset()
+            start = time.perf_counter()
+            response = request(client)
+            latencies.append(time.perf_counter() - start)
+            queries = max(queries, recorder.queries)
+            sql_time += recorder.sql_time
+            render_time += recorder.render_time
+    if response.status_code >= 400:
+        raise RuntimeError(f'HTTP {response.status_code}')
+
+    tracemalloc.start()
+    request(client)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'queries': queries,
+        'cold_queries': cold_queries,
+        'sql_ms': round(sql_time / repeat * 1000, 3),
+        'render_ms': round(render_time / repeat * 1000, 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run(sizes, repeat, seed):
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.test import Client
+
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+    settings.ALLOWED_HOSTS = ['*']
+    results = {}
+    counter = {'posts': 0}
+    for size in sizes:
+        print(f'Dataset with {size} posts...', file=sys.stderr)
+        grow_dataset(size, seed)
+        cache.clear()
+        requests, author = scenarios(counter)
+        anonymous = Client()
+        logged_in = Client()
+        logged_in.force_login(author)
+        results[str(size)] = {
+            name: measure(
+                request,
+                logged_in if name in ('add_comment', 'post_create')
+                else anonymous,
+                repeat,
+            )
+            for name, request in requests.items()
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the list of regressions of ``results``."""
+    problems = []
+    smallest = results[min(results, key=int)]
+    for size, views in results.items():
+        for name, metrics in views.items():
+            before = baseline.get(size, {}).get(name)
+            for key in ('queries', 'cold_queries'):
+                if metrics[key] > smallest[name][key]:
+                    problems.append(
+                        f'{name} @ {size}: {key} {metrics[key]}, '
+                        f'{smallest[name][key]} on the smallest dataset'
+                    )
+                if before is not None and metrics[key] > before[key]:
+                    problems.append(
+                        f'{name} @ {size}: {key} {metrics[key]}, '
+                        f'baseline {before[key]}'
+                    )
+            if before is None:
+                continue
+            for key in ('p50_ms', 'peak_kib'):
+                if metrics[key] > before[key] * (1 + tolerance):
+                    problems.append(
+                        f'{name} @ {size}: {key} {metrics[key]}, '
+                        f'baseline {before[key]}'
+                    )
+    return problems
+
+
+def print_table(results):
+    columns = ('p50_ms', 'p95_ms', 'queries', 'cold_queries', 'sql_ms',
+               'render_ms', 'peak_kib')
+    print(f'{"view":<24}' + ''.join(f'{column:>13}' for column in columns))
+    for size, views in results.items():
+        for name, metrics in views.items():
+            print(f'{f"{name} @ {size}":<24}' + ''.join(
+                f'{metrics[column]:>13}' for column in columns
+            ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--sizes', default='1000,10000',
+        help='Comma separated numbers of posts.'
+    )
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the results to this file.')
+    parser.add_argument('--baseline', help='Compare against this file.')
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='Write the results to --baseline instead of comparing.'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=1.0,
+        help='Allowed relative growth of p50 latency and peak memory.'
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    results = run(sizes, args.repeat, args.seed)
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump(results, stream, indent=2)
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as stream:
+            json.dump(results, stream, indent=2)
+        return
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as stream:
+            baseline = json.load(stream)
+    problems = compare(results, baseline, args.tolerance)
+    for problem in problems:
+        print(f'REGRESSION {problem}', file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,163 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.template.response import TemplateResponse
 
-from .models import Category, Location, Post, Comment
+from . import caching
+from .models import Category, Location, Post, Comment, Task
+
+
+class AutocompleteFilter(admin.SimpleListFilter):
+    """Sidebar filter by a foreign key that picks the value by search.
+
+    Unlike the stock related filter it never loads the whole related
+    table: choices come from the related admin's autocomplete view.
+    """
+
+    template = 'admin/blog/autocomplete_filter.html'
+    field_name = ''
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = f'{self.field_name}__id__exact'
+        field = model._meta.get_field(self.field_name)
+        self.title = field.verbose_name
+        super().__init__(request, params, model, model_admin)
+        self.widget = AutocompleteSelect(field, model_admin.admin_site)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.related_model._default_manager.all(),
+            widget=self.widget,
+            required=False,
+        )
+        self.hidden_params = [
+            (name, value)
+            for name, values in request.GET.lists()
+            if name not in (self.parameter_name, 'p')
+            for value in values
+        ]
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def rendered_widget(self):
+        return self.form_field.widget.render(
+            self.parameter_name, self.value(),
+            attrs={'id': f'id_filter_{self.field_name}'},
+        )
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            return queryset.filter(**{self.parameter_name: self.value()})
+        except (ValueError, ValidationError) as error:
+            raise IncorrectLookupParameters(error)
+
+
+class PostAutocompleteFilter(AutocompleteFilter):
+    field_name = 'post'
+
+
+def update_site_objects(modeladmin, request, queryset, message, **values):
+    """Update categories or locations in one query and reset all pages."""
+    count = queryset.update(**values)
+    caching.bump('site')
+    modeladmin.message_user(request, f'{message}: {count}.')
+
+
+def update_posts(modeladmin, request, queryset, message, **values):
+    """Update posts in one query and reset the pages they appear on."""
+    namespaces = caching.queryset_namespaces(queryset)
+    count = queryset.update(**values)
+    if 'category' in values and values['category'] is not None:
+        namespaces.append(f'category:{values["category"].slug}')
+    caching.bump(*namespaces)
+    modeladmin.message_user(request, f'{message}: {count}.')
+
+
+class BulkAssignForm(forms.Form):
+    def __init__(self, field, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['value'] = field.formfield(
+            required=not field.null, label=field.verbose_name
+        )
+
+
+def assign_posts(modeladmin, request, queryset, field_name, message):
+    """Ask for a new value of ``field_name`` and set it on the posts."""
+    field = Post._meta.get_field(field_name)
+    form = BulkAssignForm(
+        field, request.POST if 'apply' in request.POST else None
+    )
+    if form.is_valid():
+        update_posts(
+            modeladmin, request, queryset, message,
+            **{field_name: form.cleaned_data['value']}
+        )
+        return None
+    return TemplateResponse(request, 'admin/blog/bulk_assign.html', {
+        **modeladmin.admin_site.each_context(request),
+        'title': field.verbose_name,
+        'opts': modeladmin.model._meta,
+        'form': form,
+        'queryset': queryset,
+        'action': request.POST['action'],
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        'select_across': request.POST.get('select_across') == '1',
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+    })
+
+
+@admin.action(description='Опубликовать выбранные')
+def publish(modeladmin, request, queryset):
+    update_site_objects(
+        modeladmin, request, queryset, 'Опубликовано', is_published=True
+    )
+
+
+@admin.action(description='Снять с публикации выбранные')
+def unpublish(modeladmin, request, queryset):
+    update_site_objects(
+        modeladmin, request, queryset, 'Снято с публикации',
+        is_published=False
+    )
+
+
+@admin.action(description='Опубликовать выбранные публикации')
+def publish_posts(modeladmin, request, queryset):
+    update_posts(
+        modeladmin, request, queryset, 'Опубликовано публикаций',
+        is_published=True
+    )
+
+
+@admin.action(description='Снять с публикации выбранные публикации')
+def unpublish_posts(modeladmin, request, queryset):
+    update_posts(
+        modeladmin, request, queryset, 'Снято с публикации публикаций',
+        is_published=False
+    )
+
+
+@admin.action(description='Перенести в другую категорию')
+def move_to_category(modeladmin, request, queryset):
+    return assign_posts(
+        modeladmin, request, queryset, 'category',
+        'Перенесено публикаций'
+    )
+
+
+@admin.action(description='Сменить местоположение')
+def change_location(modeladmin, request, queryset):
+    return assign_posts(
+        modeladmin, request, queryset, 'location',
+        'Изменено местоположение публикаций'
+    )
 
 
 @admin.register(Category)
@@ -8,6 +165,7 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('title', 'is_published', 'created_at')
     list_filter = ('is_published',)
     search_fields = ('title', 'description')
+    actions = (publish, unpublish)
 
 
 @admin.register(Location)
@@ -15,6 +173,7 @@ class LocationAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_published', 'created_at')
     list_filter = ('is_published',)
     search_fields = ('name',)
+    actions = (publish, unpublish)
 
 
 @admin.register(Post)
@@ -23,17 +182,38 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('category', 'is_published', 'pub_date')
     search_fields = ('title', 'text')
     date_hierarchy = 'pub_date'
+    list_select_related = ('author', 'category')
+    show_full_result_count = False
+    actions = (
+        publish_posts, unpublish_posts, move_to_category, change_location
+    )
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'post', 'created_at', 'short_text')
-    list_filter = ('created_at', 'post')
+    list_filter = ('created_at', PostAutocompleteFilter)
     search_fields = ('text', 'author__username', 'post__title')
     date_hierarchy = 'created_at'
+    list_select_related = ('author', 'post')
+    show_full_result_count = False
+    autocomplete_fields = ('author', 'post')
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(
+            Comment._meta.get_field('post'), self.admin_site
+        ).media
 
     def short_text(self, obj: Comment) -> str:
         if len(obj.text) > 50:
             return f"{obj.text[:50]}..."
         return obj.text
     short_text.short_description = 'Текст комментария'  # type: ignore
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('last_error',)
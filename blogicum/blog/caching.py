@@ -0,0 +1,221 @@
+"""Versioned cache namespaces shared by the blog caches.
+
+Cached values are stored under keys that embed the current version of
+every namespace they depend on (``'site'``, ``'index'``,
+``'category:<slug>'``, ``'author:<username>'``, ``'post:<id>'``). Bumping
+a namespace makes all dependent keys unreachable at once, so invalidation
+never has to know which concrete keys were written.
+
+Pages show comment counts and change with every comment. What depends
+only on the posts of a page, like its feeds and post count, uses the
+``'list:<namespace>'`` namespaces instead, which only post writes and
+site-wide changes bump.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+from .constants import PAGE_CACHE_TIMEOUT
+
+KEY_PREFIX = 'blog'
+STATS = ('hits', 'misses')
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:version:{namespace}'
+
+
+def get_versions(*namespaces):
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump(*namespaces):
+    """Invalidate every key that depends on one of ``namespaces``."""
+    cache.set_many(
+        {_version_key(namespace): time.time_ns() for namespace in namespaces},
+        timeout=None,
+    )
+
+
+def make_key(name, *namespaces):
+    versions = get_versions('site', *namespaces)
+    stamp = '.'.join(str(version) for version in versions)
+    return f'{KEY_PREFIX}:{name}:{stamp}'
+
+
+def list_namespace(namespace):
+    """Namespace of the posts listed on the page of ``namespace``."""
+    return f'list:{namespace}'
+
+
+def post_namespaces(category_slugs=(), usernames=(), post_ids=(),
+                    lists=True):
+    """Namespaces of the pages a post with these relations appears on.
+
+    With ``lists`` the post lists of these pages are included too; leave
+    them out for changes that do not add, remove or edit posts.
+    """
+    pages = (
+        ['index']
+        + [f'category:{slug}' for slug in set(category_slugs) if slug]
+        + [f'author:{name}' for name in set(usernames) if name]
+    )
+    namespaces = pages + [
+        f'post:{pk}' for pk in set(post_ids) if pk is not None
+    ]
+    if lists:
+        namespaces += [list_namespace(namespace) for namespace in pages]
+    return namespaces
+
+
+def queryset_namespaces(posts):
+    """Namespaces of the pages showing any post of the ``posts`` queryset.
+
+    Collect them before a bulk ``update()`` that may move the posts.
+    """
+    rows = posts.values_list('pk', 'category__slug', 'author__username')
+    post_ids, category_slugs, usernames = list(zip(*rows)) or ((), (), ())
+    return post_namespaces(category_slugs, usernames, post_ids)
+
+
+def incr_stat(name):
+    metrics.PAGE_CACHE.inc(result=name)
+    key = f'{KEY_PREFIX}:stats:page:{name}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    keys = {f'{KEY_PREFIX}:stats:page:{name}': name for name in STATS}
+    values = cache.get_many(keys)
+    return {name: values.get(key, 0) for key, name in keys.items()}
+
+
+def _page_timeout():
+    """Seconds a page may be cached before a scheduled post shows up."""
+    from .models import Post
+
+    timeout = getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', PAGE_CACHE_TIMEOUT)
+    now = timezone.now()
+    next_pub_date = Post.objects.filter(
+        is_published=True, pub_date__gt=now
+    ).aggregate(next=Min('pub_date'))['next']
+    if next_pub_date is not None:
+        timeout = min(timeout, (next_pub_date - now).total_seconds())
+    return max(int(timeout), 1)
+
+
+def cache_anonymous_page(*namespaces):
+    """Cache successful GET responses of a view for anonymous users.
+
+    ``namespaces`` are format strings filled with the view keyword
+    arguments, e.g. ``'category:{category_slug}'``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or getattr(
+                    settings, 'BLOG_PAGE_CACHE_TIMEOUT', PAGE_CACHE_TIMEOUT
+                ) <= 0
+            ):
+                return view(request, *args, **kwargs)
+
+            path = hashlib.md5(
+                request.get_full_path().encode(), usedforsecurity=False
+            ).hexdigest()
+            key = make_key(
+                f'page:{view.__name__}:{path}',
+                *(namespace.format(**kwargs) for namespace in namespaces)
+            )
+            response = cache.get(key)
+            if response is not None:
+                incr_stat('hits')
+                response['X-Cache'] = 'HIT'
+                return response
+
+            incr_stat('misses')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                response['X-Cache'] = 'MISS'
+                cache.set(key, response, timeout=_page_timeout())
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(*namespaces, posts=None):
+    """Answer GET requests with 304 when the page has not changed.
+
+    The ETag and Last-Modified header are derived from the versions of
+    ``namespaces`` (filled with the view keyword arguments) and, when
+    ``posts`` is given, from the newest visible ``pub_date`` returned by
+    the queryset built by ``posts(**kwargs)``, so scheduled posts that
+    become visible change them too. The ETag also depends on the session,
+    which is renewed on login together with the CSRF token, so a page
+    with an old token is not reused. The template is never rendered for
+    a 304 response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            versions = get_versions('site', *(
+                namespace.format(**kwargs) for namespace in namespaces
+            ))
+            last_modified = datetime.fromtimestamp(
+                max(versions) / 10 ** 9, tz=dt_timezone.utc
+            )
+            latest = None
+            if posts is not None:
+                latest = posts(**kwargs).latest_pub_date()
+                if latest is not None:
+                    last_modified = max(last_modified, latest)
+            session = getattr(request, 'session', None)
+            session_key = session.session_key if session else None
+            etag = quote_etag(hashlib.md5(
+                f'{versions}:{latest}:{request.user.pk}:{session_key}'
+                .encode(),
+                usedforsecurity=False
+            ).hexdigest())
+            last_modified = int(last_modified.timestamp())
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response.headers.setdefault('ETag', etag)
+                    response.headers.setdefault(
+                        'Last-Modified', http_date(last_modified)
+                    )
+            patch_vary_headers(response, ('Cookie',))
+            patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -7,3 +7,51 @@ MIN_LENGTH_SHORT = 3
 MIN_LENGTH_TEXT = 10
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 50
+FEED_ITEMS = 20
+
+COUNT_CACHE_TIMEOUT = 60
+
+PAGE_CACHE_TIMEOUT = 300
+
+TIMING_SAMPLE_RATE = 1.0
+
+# Seconds reads stay on the primary database after a write.
+REPLICA_STICKY_SECONDS = 10
+
+# Upper bounds in seconds of the request latency histogram buckets.
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_FLUSH_INTERVAL = 5
+# Views whose requests are logged by the timing middleware.
+TIMING_LOG_MODULES = ('blog.views', 'pages.views')
+
+# Widths in pixels of the generated Post.image variants.
+IMAGE_VARIANTS = {
+    'feed': 640,
+    'detail': 1280,
+}
+IMAGE_FORMATS = {
+    'jpg': 'JPEG',
+    'webp': 'WEBP',
+}
+
+TASK_MAX_ATTEMPTS = 5
+# Seconds after which a task still marked running is considered abandoned.
+TASK_LOCK_TIMEOUT = 600
+
+# Run on every new SQLite connection by blog.database.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Bytes of the file read through memory mapping.
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative sizes are in KiB.
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+SEARCH_MAX_RESULTS = 1000
+SEARCH_INDEX_MAX_POSTINGS = 5_000_000
+# Seconds after which the in-memory index is rebuilt in the background.
+SEARCH_INDEX_MAX_AGE = 300
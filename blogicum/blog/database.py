@@ -0,0 +1,26 @@
+"""SQLite tuning applied to every new database connection.
+
+A plain SQLite file journals with a rollback journal: a writer locks out
+readers and concurrent writers get "database is locked". On connect the
+pragmas of ``BLOG_SQLITE_PRAGMAS`` (by default ``SQLITE_PRAGMAS``) are
+run, so the database uses write-ahead logging, where readers never
+block the writer, and waiting writers retry for ``busy_timeout``
+milliseconds instead of failing at once.
+"""
+from django.conf import settings
+
+from .constants import SQLITE_PRAGMAS
+
+
+def get_pragmas():
+    pragmas = getattr(settings, 'BLOG_SQLITE_PRAGMAS', None)
+    return SQLITE_PRAGMAS if pragmas is None else pragmas
+
+
+def configure_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver running the pragmas on SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in get_pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,136 @@
+"""RSS and Atom feeds of published posts.
+
+Feeds use the list namespaces of the HTML pages they mirror, so they are
+answered with 304 or from the page cache until a post on them changes;
+comments do not regenerate them.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+
+from .caching import cache_anonymous_page, conditional_page, list_namespace
+from .constants import FEED_ITEMS
+from .models import Category, Post
+
+User = get_user_model()
+
+
+class LatestPostsFeed(Feed):
+    title = 'Блогикум'
+    link = reverse_lazy('blog:index')
+    description = 'Новые публикации'
+
+    def posts(self, obj):
+        return Post.objects.filter_published()
+
+    def items(self, obj):
+        return self.posts(obj).select_related(
+            'author', 'category'
+        ).order_by('-pub_date')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        # Post cards show usernames too; full names would go stale in the
+        # feed cache, which is not invalidated on profile edits.
+        return item.author.username
+
+    def item_categories(self, item):
+        return (item.category.title,) if item.category_id else ()
+
+
+class CategoryPostsFeed(LatestPostsFeed):
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category, slug=category_slug, is_published=True
+        )
+
+    def posts(self, obj):
+        return obj.posts.filter_published()
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=(obj.slug,))
+
+    def description(self, obj):
+        return obj.description
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def posts(self, obj):
+        return obj.posts.filter_published()
+
+    def title(self, obj):
+        return f'Блогикум: {obj.username}'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=(obj.username,))
+
+    def description(self, obj):
+        return f'Публикации пользователя {obj.username}'
+
+
+def atom(feed_class):
+    return type(f'Atom{feed_class.__name__}', (feed_class,), {
+        'feed_type': Atom1Feed,
+        'subtitle': feed_class.description,
+    })
+
+
+def feed_view(feed_class, namespace, posts):
+    """Wrap a feed into the conditional GET and page cache decorators."""
+    feed = feed_class()
+    namespace = list_namespace(namespace)
+
+    def view(request, **kwargs):
+        return feed(request, **kwargs)
+
+    view.__name__ = view.__qualname__ = feed_class.__name__
+    return conditional_page(namespace, posts=posts)(
+        cache_anonymous_page(namespace)(view)
+    )
+
+
+def latest_posts(**kwargs):
+    return Post.objects.filter_published()
+
+
+def category_posts(category_slug):
+    return Post.objects.filter_published().filter(
+        category__slug=category_slug
+    )
+
+
+def author_posts(username):
+    return Post.objects.filter_published().filter(author__username=username)
+
+
+latest_rss = feed_view(LatestPostsFeed, 'index', latest_posts)
+latest_atom = feed_view(atom(LatestPostsFeed), 'index', latest_posts)
+category_rss = feed_view(
+    CategoryPostsFeed, 'category:{category_slug}', category_posts
+)
+category_atom = feed_view(
+    atom(CategoryPostsFeed), 'category:{category_slug}', category_posts
+)
+author_rss = feed_view(AuthorPostsFeed, 'author:{username}', author_posts)
+author_atom = feed_view(
+    atom(AuthorPostsFeed), 'author:{username}', author_posts
+)
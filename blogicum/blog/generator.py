@@ -0,0 +1,257 @@
+"""Synthetic blog content for load tests and benchmarks.
+
+The generated data is skewed the way real blogs are: a few authors
+write most posts, a few posts collect most comments, some categories
+and locations are hidden and some posts are scheduled for the future.
+Everything is inserted with ``bulk_create`` in batches, and only the
+primary keys and dates of the posts are kept in memory.
+"""
+import itertools
+import random
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import caching
+from .models import Category, Comment, Location, Post
+from .services import recount_comments
+from .transfer import raw_dates
+
+User = get_user_model()
+
+WORDS = (
+    'байкал озеро горы лес река путешествие поход палатка костёр рыбалка '
+    'город музей театр концерт выставка кофе завтрак пирог рецепт сад '
+    'весна лето осень зима снег дождь солнце ветер море пляж поезд '
+    'самолёт вокзал дорога книга фильм история друзья семья работа'
+).split()
+SYLLABLES = 'ка ро ми ле то на су вы же по ль де зо ри ба ну ст ер'.split()
+
+# Shares of hidden or unusual objects.
+UNPUBLISHED_CATEGORIES = 0.1
+UNPUBLISHED_LOCATIONS = 0.1
+UNPUBLISHED_POSTS = 0.05
+SCHEDULED_POSTS = 0.02
+POSTS_WITHOUT_LOCATION = 0.2
+# Exponent of the Zipf-like popularity of authors, categories and posts.
+SKEW = 1.1
+HISTORY_DAYS = 3 * 365
+
+
+def zipf_weights(size, skew=SKEW):
+    """Cumulative weights giving item ``i`` a share of ``1 / (i + 1)**s``."""
+    return list(itertools.accumulate(
+        1 / (rank ** skew) for rank in range(1, size + 1)
+    ))
+
+
+def vocabulary(rng, size=5000):
+    """Known words plus synthetic ones, with Zipf cumulative weights."""
+    words = set(WORDS)
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words, zipf_weights(len(words))
+
+
+class ContentGenerator:
+    def __init__(self, seed=None, batch_size=5000, password=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.password = make_password(password)
+        self.now = timezone.now()
+        self.words, self.word_weights = vocabulary(self.rng)
+
+    def phrase(self, length):
+        return ' '.join(self.rng.choices(
+            self.words, cum_weights=self.word_weights, k=length
+        ))
+
+    def _insert(self, model, objs):
+        """Bulk insert ``objs`` in batches; yield every inserted batch."""
+        objs = iter(objs)
+        while batch := list(itertools.islice(objs, self.batch_size)):
+            with transaction.atomic():
+                yield model.objects.bulk_create(batch)
+
+    @staticmethod
+    def _first_number(model):
+        """Number after the largest pk, to keep generated names unique."""
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def users(self, count):
+        start = self._first_number(User)
+        objs = (
+            User(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password=self.password,
+            )
+            for i in range(start, start + count)
+        )
+        pks = array('q')
+        for batch in self._insert(User, objs):
+            pks.extend(user.pk for user in batch)
+        return pks
+
+    def categories(self, count):
+        start = self._first_number(Category)
+        objs = (
+            Category(
+                title=self.phrase(2).capitalize(),
+                description=self.phrase(20),
+                slug=f'category-{i}',
+                is_published=self.rng.random() >= UNPUBLISHED_CATEGORIES,
+                created_at=self.now,
+            )
+            for i in range(start, start + count)
+        )
+        return array('q', (
+            category.pk for batch in self._insert(Category, objs)
+            for category in batch
+        ))
+
+    def locations(self, count):
+        objs = (
+            Location(
+                name=self.phrase(2).capitalize(),
+                is_published=self.rng.random() >= UNPUBLISHED_LOCATIONS,
+                created_at=self.now,
+            )
+            for _ in range(count)
+        )
+        return array('q', (
+            location.pk for batch in self._insert(Location, objs)
+            for location in batch
+        ))
+
+    def pub_date(self):
+        if self.rng.random() < SCHEDULED_POSTS:
+            return self.now + timedelta(
+                minutes=self.rng.randint(1, 30 * 24 * 60)
+            )
+        # Newer posts are more frequent.
+        age = HISTORY_DAYS * self.rng.random() ** 2
+        return self.now - timedelta(days=age)
+
+    def posts(self, count, users, categories, locations):
+        """Insert posts.
+
+        Return their number and the pks and publication timestamps of the
+        posts readers can already see and comment on.
+        """
+        user_weights = zipf_weights(len(users))
+        category_weights = zipf_weights(len(categories))
+
+        def build():
+            for _ in range(count):
+                pub_date = self.pub_date()
+                location = None
+                if locations and self.rng.random() >= POSTS_WITHOUT_LOCATION:
+                    location = self.rng.choice(locations)
+                yield Post(
+                    title=self.phrase(self.rng.randint(2, 6)).capitalize(),
+                    text=self.phrase(self.rng.randint(20, 200)),
+                    pub_date=pub_date,
+                    created_at=min(pub_date, self.now),
+                    is_published=self.rng.random() >= UNPUBLISHED_POSTS,
+                    author_id=self.rng.choices(
+                        users, cum_weights=user_weights
+                    )[0],
+                    category_id=self.rng.choices(
+                        categories, cum_weights=category_weights
+                    )[0] if categories else None,
+                    location_id=location,
+                )
+
+        done = 0
+        pks = array('q')
+        dates = array('d')
+        for batch in self._insert(Post, build()):
+            done += len(batch)
+            for post in batch:
+                if post.is_published and post.pub_date <= self.now:
+                    pks.append(post.pk)
+                    dates.append(post.pub_date.timestamp())
+        return done, pks, dates
+
+    def comments(self, count, users, post_pks, post_dates):
+        """Insert comments, most of them under a few hot posts.
+
+        ``post_pks`` and ``post_dates`` are the visible posts returned by
+        :meth:`posts`.
+        """
+        if not post_pks:
+            return 0
+        # Popularity does not depend on the age of a post.
+        hot = list(range(len(post_pks)))
+        self.rng.shuffle(hot)
+        post_weights = zipf_weights(len(hot))
+        user_weights = zipf_weights(len(users))
+        now = self.now.timestamp()
+
+        def build():
+            for _ in range(count):
+                index = self.rng.choices(hot, cum_weights=post_weights)[0]
+                created_at = min(
+                    post_dates[index] + self.rng.expovariate(1 / 86400), now
+                )
+                yield Comment(
+                    text=self.phrase(self.rng.randint(3, 40)),
+                    post_id=post_pks[index],
+                    author_id=self.rng.choices(
+                        users, cum_weights=user_weights
+                    )[0],
+                    created_at=datetime.fromtimestamp(
+                        created_at, tz=dt_timezone.utc
+                    ),
+                )
+
+        done = 0
+        for batch in self._insert(Comment, build()):
+            done += len(batch)
+        return done
+
+
+def generate(users=100, categories=10, locations=20, posts=1000,
+             comments=5000, seed=None, batch_size=5000, password=None,
+             log=None):
+    """Fill the database with synthetic content; return created counts.
+
+    ``log`` is called with a message after every stage.
+    """
+    log = log or (lambda message: None)
+    generator = ContentGenerator(
+        seed=seed, batch_size=batch_size, password=password
+    )
+    with raw_dates():
+        user_pks = generator.users(users)
+        log(f'Пользователей: {len(user_pks)}')
+        category_pks = generator.categories(categories)
+        log(f'Категорий: {len(category_pks)}')
+        location_pks = generator.locations(locations)
+        log(f'Местоположений: {len(location_pks)}')
+        post_count, post_pks, post_dates = generator.posts(
+            posts, user_pks, category_pks, location_pks
+        )
+        log(f'Публикаций: {post_count}')
+        comment_count = generator.comments(
+            comments, user_pks, post_pks, post_dates
+        )
+        log(f'Комментариев: {comment_count}')
+    for _ in recount_comments(batch_size=batch_size):
+        pass
+    caching.bump('site')
+    return {
+        'users': len(user_pks),
+        'categories': len(category_pks),
+        'locations': len(location_pks),
+        'posts': post_count,
+        'comments': comment_count,
+    }
@@ -0,0 +1,84 @@
+"""Resized and re-encoded variants of ``Post.image``.
+
+Variants are generated by a background task (see :mod:`blog.tasks`),
+never inside the request that uploaded the image. Until they are ready
+the templates fall back to the original file.
+"""
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import caching
+from .constants import IMAGE_FORMATS, IMAGE_VARIANTS
+from .tasks import task
+
+
+def _encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=82, optimize=True, progressive=True
+        )
+    else:
+        image.save(buffer, image_format, quality=80, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(post):
+    """Write every variant of ``post.image`` and return their names."""
+    storage = post.image.storage
+    path = PurePosixPath(post.image.name)
+    variants = {}
+    with post.image.open('rb') as source, Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        for label, width in IMAGE_VARIANTS.items():
+            image = original.copy()
+            image.thumbnail((width, width * 4))
+            files = {}
+            for extension, image_format in IMAGE_FORMATS.items():
+                name = str(
+                    path.parent / 'variants'
+                    / f'{path.stem}_{label}.{extension}'
+                )
+                files[extension] = storage.save(
+                    name, _encode(image, image_format)
+                )
+            variants[label] = {'width': image.width, **files}
+    return variants
+
+
+@task
+def delete_variants(variants):
+    from .models import Post
+
+    storage = Post._meta.get_field('image').storage
+    for variant in variants.values():
+        for extension in IMAGE_FORMATS:
+            if variant.get(extension):
+                storage.delete(variant[extension])
+
+
+@task
+def process_post_image(post_id):
+    from .models import Post
+
+    post = Post.objects.select_related('author', 'category').filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.image:
+        return
+    variants = build_variants(post)
+    updated = Post.objects.filter(
+        pk=post_id, image=post.image.name
+    ).update(image_variants=variants)
+    if not updated:
+        delete_variants(variants)
+        return
+    caching.bump(*caching.post_namespaces(
+        category_slugs=(post.category and post.category.slug,),
+        usernames=(post.author.username,),
+        post_ids=(post.pk,),
+        lists=False,
+    ))
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from blog.transfer import export_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает пользователей и содержимое блога в формате NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Количество объектов, читаемых одним запросом.'
+        )
+
+    def handle(self, *args, output, batch_size, **options):
+        if output is None:
+            for _ in export_records(sys.stdout, batch_size=batch_size):
+                pass
+            return
+        with open(output, 'w', encoding='utf-8') as stream:
+            for done in export_records(stream, batch_size=batch_size):
+                self.stdout.write(f'Выгружено объектов: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, выгружено объектов: {done}'
+        ))
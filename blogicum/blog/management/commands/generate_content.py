@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.generator import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местоположениями, публикациями и комментариями.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+            ('users', 100),
+            ('categories', 10),
+            ('locations', 20),
+            ('posts', 1000),
+            ('comments', 5000),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Количество создаваемых объектов ({default}).'
+            )
+        parser.add_argument(
+            '--seed', type=int,
+            help='Начальное значение генератора случайных чисел.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество объектов, сохраняемых одним запросом.'
+        )
+        parser.add_argument(
+            '--password',
+            help='Пароль пользователей; по умолчанию вход запрещён.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['users'] and (
+            options['posts'] or options['comments']
+        ):
+            raise CommandError(
+                'Для публикаций и комментариев нужен хотя бы один '
+                'пользователь.'
+            )
+        counts = generate(
+            users=options['users'],
+            categories=options['categories'],
+            locations=options['locations'],
+            posts=options['posts'],
+            comments=options['comments'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            password=options['password'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, создано объектов: {sum(counts.values())}'
+        ))
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from blog.transfer import import_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей и содержимое блога из файла NDJSON, '
+        'созданного командой export_content.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с выгрузкой.')
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Количество объектов, сохраняемых одним запросом.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку с сохранённого места.'
+        )
+
+    def handle(self, *args, path, batch_size, resume, **options):
+        progress = Path(f'{path}.progress')
+        skip = 0
+        if resume and progress.exists():
+            skip = int(progress.read_text())
+            self.stdout.write(f'Продолжение со строки {skip + 1}')
+        try:
+            with open(path, encoding='utf-8') as stream:
+                for done in import_records(
+                    stream, batch_size=batch_size, skip=skip, resume=resume
+                ):
+                    progress.write_text(str(done))
+                    self.stdout.write(f'Загружено строк: {done}')
+        except (LookupError, ValueError) as error:
+            raise CommandError(f'Некорректная выгрузка: {error}')
+        except IntegrityError as error:
+            raise CommandError(f'Нарушена целостность данных: {error}')
+        progress.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS('Готово'))
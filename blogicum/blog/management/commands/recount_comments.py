@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.services import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает количество комментариев у публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Количество публикаций, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        done = 0
+        for done in recount_comments(batch_size=batch_size):
+            self.stdout.write(f'Обработано публикаций: {done}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, пересчитано публикаций: {done}'
+        ))
@@ -0,0 +1,60 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog import tasks
+
+
+def _worker(poll_interval, once):
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+    signal.signal(signal.SIGINT, lambda *args: stopping.set())
+    tasks.work(
+        poll_interval=poll_interval, once=once, should_stop=stopping.is_set
+    )
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики фоновых задач блога.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Количество процессов-обработчиков.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить все готовые задачи и завершиться.'
+        )
+
+    def handle(self, *args, processes, poll_interval, once, **options):
+        if processes == 1:
+            try:
+                tasks.work(poll_interval=poll_interval, once=once)
+            except KeyboardInterrupt:
+                pass
+            return
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=_worker, args=(poll_interval, once), daemon=True
+            )
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Запущено обработчиков: {processes}')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
@@ -0,0 +1,374 @@
+"""In-process metrics exposed in the Prometheus text format.
+
+Counters and histograms live in the memory of each process. When
+``BLOG_METRICS_DIR`` is set, every process also dumps its values to
+``<dir>/<pid>-<start>.json`` at most every ``BLOG_METRICS_FLUSH_INTERVAL``
+seconds and the endpoint sums the files of all processes, so gunicorn
+workers are reported together. A recycled worker whose pid is reused
+writes a file of its own. On scrape the files of exited processes are
+added to ``archive.json`` and removed, so their counts are kept while
+the directory does not grow (this needs ``fcntl``; without it the files
+are only summed).
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from django.conf import settings
+from django.db.models import Count
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .constants import METRICS_BUCKETS, METRICS_FLUSH_INTERVAL
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+ARCHIVE = 'archive.json'
+
+_lock = threading.Lock()
+_metrics = {}
+_last_flush = 0.0
+_started = time.time_ns()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        _metrics[name] = self
+
+    def key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def format_labels(self, key, **extra):
+        pairs = [*zip(self.labels, key), *extra.items()]
+        if not pairs:
+            return ''
+        return '{' + ','.join(
+            f'{label}="{_escape(value)}"' for label, value in pairs
+        ) + '}'
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        _maybe_flush()
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def samples(self, values):
+        for key, value in sorted(values.items()):
+            yield f'{self.name}_total{self.format_labels(key)} {value}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=METRICS_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            counts, total = self.values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0)
+            )
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+        _maybe_flush()
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return list(value[0]), value[1]
+        return (
+            [a + b for a, b in zip(total[0], value[0])],
+            total[1] + value[1],
+        )
+
+    def samples(self, values):
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket'
+                    f'{self.format_labels(key, le=bound)} {cumulative}'
+                )
+            yield f'{self.name}_sum{self.format_labels(key)} {total}'
+            yield f'{self.name}_count{self.format_labels(key)} {cumulative}'
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _metrics_dir():
+    path = getattr(settings, 'BLOG_METRICS_DIR', None)
+    return Path(path) if path else None
+
+
+def _snapshot():
+    """Serialize the values of this process as JSON."""
+    with _lock:
+        return json.dumps({
+            name: [[list(key), value] for key, value in metric.values.items()]
+            for name, metric in _metrics.items()
+        })
+
+
+def flush():
+    """Write the values of this process to the metrics directory."""
+    global _last_flush
+    directory = _metrics_dir()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    _last_flush = time.monotonic()
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'w') as stream:
+        stream.write(_snapshot())
+    os.replace(temporary, directory / _file_name(os.getpid(), _started))
+
+
+def _file_name(pid, started):
+    return f'{pid}-{started}.json'
+
+
+def _reset_after_fork():
+    """Give a forked worker its own file and no values of its parent."""
+    global _lock, _last_flush, _started
+    _lock = threading.Lock()
+    _last_flush = 0.0
+    _started = time.time_ns()
+    for metric in _metrics.values():
+        metric.values.clear()
+
+
+atexit.register(flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _maybe_flush():
+    interval = getattr(
+        settings, 'BLOG_METRICS_FLUSH_INTERVAL', METRICS_FLUSH_INTERVAL
+    )
+    if (
+        _metrics_dir() is not None
+        and time.monotonic() - _last_flush >= interval
+    ):
+        flush()
+
+
+def _read(path, default=None):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return default
+
+
+def _add(merged, snapshot):
+    """Add the values of ``snapshot`` to ``{name: {labels: value}}``."""
+    for name, values in snapshot.items():
+        metric = _metrics.get(name)
+        if metric is None:
+            continue
+        for key, value in values:
+            key = tuple(key)
+            merged[name][key] = metric.merge(merged[name].get(key), value)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _exited(paths):
+    """Files of ``paths`` written by processes that are gone.
+
+    Of several files of one pid only the newest can belong to a running
+    process; the pid of the others was reused.
+    """
+    processes = {}
+    for path in paths:
+        try:
+            pid, started = map(int, path.stem.split('-'))
+        except ValueError:
+            continue
+        processes[path] = pid, started
+    newest = {}
+    for pid, started in processes.values():
+        newest[pid] = max(started, newest.get(pid, started))
+    return [
+        path for path, (pid, started) in processes.items()
+        if started < newest[pid] or not _alive(pid)
+    ]
+
+
+@contextmanager
+def _compaction_lock(directory):
+    """Yield whether this process may compact ``directory``."""
+    if fcntl is None:
+        yield False
+        return
+    with open(directory / 'compact.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _collect():
+    """Return ``{name: {labels: value}}`` summed over all processes."""
+    directory = _metrics_dir()
+    if directory is None:
+        with _lock:
+            return {
+                name: dict(metric.values) for name, metric in _metrics.items()
+            }
+    flush()
+    merged = {name: {} for name in _metrics}
+    with _compaction_lock(directory) as compact:
+        archive_path = directory / ARCHIVE
+        archive = _read(archive_path, {'merged': [], 'metrics': {}})
+        # Files listed in the archive are already counted in it; they
+        # only remain when removing them failed.
+        archived = set(archive['merged'])
+        paths = [
+            path for path in directory.glob('*-*.json')
+            if path.name not in archived
+        ]
+        exited = _exited(paths) if compact else []
+        if exited:
+            totals = {name: {} for name in _metrics}
+            _add(totals, archive['metrics'])
+            for path in exited:
+                _add(totals, _read(path, {}))
+            archive = {
+                'merged': [
+                    path.name for path in exited
+                ] + [
+                    name for name in archived
+                    if (directory / name).exists()
+                ],
+                'metrics': {
+                    name: [[list(key), value] for key, value in values.items()]
+                    for name, values in totals.items()
+                },
+            }
+            handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(handle, 'w') as stream:
+                json.dump(archive, stream)
+            os.replace(temporary, archive_path)
+            for path in exited:
+                path.unlink(missing_ok=True)
+            paths = [path for path in paths if path not in exited]
+        _add(merged, archive['metrics'])
+        for path in paths:
+            _add(merged, _read(path, {}))
+    return merged
+
+
+def _gauges():
+    """Values read from the database when the endpoint is scraped."""
+    from .models import Task
+
+    lines = [
+        '# HELP blog_task_queue_depth Background tasks by name and status.',
+        '# TYPE blog_task_queue_depth gauge',
+    ]
+    rows = Task.objects.values('name', 'status').annotate(
+        total=Count('pk')
+    ).order_by('name', 'status')
+    for row in rows:
+        lines.append(
+            f'blog_task_queue_depth{{name="{_escape(row["name"])}",'
+            f'status="{row["status"]}"}} {row["total"]}'
+        )
+    return lines
+
+
+def render():
+    lines = []
+    for name, values in _collect().items():
+        metric = _metrics[name]
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        lines.extend(metric.samples(values))
+    lines.extend(_gauges())
+    return '\n'.join(lines) + '\n'
+
+
+def _authorized(request):
+    token = getattr(settings, 'BLOG_METRICS_TOKEN', None)
+    if token:
+        header = request.headers.get('Authorization', '')
+        return constant_time_compare(header, f'Bearer {token}')
+    return request.user.is_staff
+
+
+def metrics_view(request):
+    if not _authorized(request):
+        return HttpResponse(status=403)
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+REQUEST_DURATION = Histogram(
+    'blog_request_duration_seconds', 'Request latency by URL name.',
+    labels=('view',)
+)
+RESPONSES = Counter(
+    'blog_responses', 'Responses by URL name and status code.',
+    labels=('view', 'status')
+)
+SAMPLED_REQUESTS = Counter(
+    'blog_sampled_requests',
+    'Requests sampled for query counting, by URL name.',
+    labels=('view',)
+)
+DB_QUERIES = Counter(
+    'blog_db_queries', 'SQL queries run by sampled requests, by URL name.',
+    labels=('view',)
+)
+PAGE_CACHE = Counter(
+    'blog_page_cache', 'Anonymous page cache lookups by result.',
+    labels=('result',)
+)
+WRITES = Counter(
+    'blog_writes', 'Saved and deleted posts and comments.',
+    labels=('model', 'action')
+)
@@ -0,0 +1,267 @@
+"""Per-request instrumentation of SQL queries, templates and views.
+
+``TimingMiddleware``: a sampled request gets a ``Server-Timing`` header
+and, for the views of ``TIMING_LOG_MODULES``, one JSON log line on the
+``blog.timing`` logger. Requests outside the sample run with no
+instrumentation at all.
+
+``DuplicateQueryMiddleware``: reports statements repeated within one
+request, the usual sign of an N+1 query.
+
+``MetricsMiddleware``: feeds the request metrics of :mod:`blog.metrics`;
+queries are counted on the requests sampled by ``TimingMiddleware`` only.
+
+``ReplicaMiddleware``: tracks writes for the read replica routing of
+:mod:`blog.routers`.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template
+
+from . import metrics, routers
+from .constants import TIMING_LOG_MODULES, TIMING_SAMPLE_RATE
+from .querycheck import DuplicateQueriesError, DuplicateQueryDetector
+
+logger = logging.getLogger('blog.timing')
+duplicates_logger = logging.getLogger('blog.querycheck')
+
+_current = ContextVar('blog_request_timing', default=None)
+_queries = ContextVar('blog_request_queries', default=None)
+
+
+class QueryStats:
+    """``execute_wrapper`` counting the queries of a request and their time."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+@contextmanager
+def track_queries():
+    """Yield the :class:`QueryStats` of the current request.
+
+    The outermost caller installs the wrapper; nested middleware share
+    it instead of wrapping every query once more.
+    """
+    stats = _queries.get()
+    if stats is not None:
+        yield stats
+        return
+    stats = QueryStats()
+    token = _queries.set(stats)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            yield stats
+    finally:
+        _queries.reset(token)
+
+
+class RequestTiming:
+    def __init__(self, stats):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.view_time = 0.0
+        self.stats = stats
+        self.template_time = 0.0
+        self._rendering = 0
+
+    def server_timing(self, total):
+        stats = self.stats
+        return ', '.join((
+            f'db;dur={stats.db_time * 1000:.1f};'
+            f'desc="{stats.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+# Rendering is timed by wrapping the template backend once; the wrapper
+# only looks up a context variable when no request is being measured.
+_render = Template.render
+
+
+def _timed_render(self, *args, **kwargs):
+    timing = _current.get()
+    if timing is None:
+        return _render(self, *args, **kwargs)
+    # Only the outermost render counts; includes are part of it.
+    timing._rendering += 1
+    start = time.perf_counter()
+    try:
+        return _render(self, *args, **kwargs)
+    finally:
+        timing._rendering -= 1
+        if not timing._rendering:
+            timing.template_time += time.perf_counter() - start
+
+
+Template.render = _timed_render
+
+
+class TimingMiddleware:
+    """Measure sampled requests and report where their time went.
+
+    Put it first in ``MIDDLEWARE`` so the total covers the other
+    middleware too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(
+            settings, 'BLOG_TIMING_SAMPLE_RATE', TIMING_SAMPLE_RATE
+        )
+        if not sample_rate or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        with track_queries() as stats:
+            timing = RequestTiming(stats)
+            token = _current.set(timing)
+            try:
+                response = self.get_response(request)
+            finally:
+                _current.reset(token)
+        end = time.perf_counter()
+        total = end - timing.start
+        if timing.view_start is not None:
+            timing.view_time = end - timing.view_start
+        response['Server-Timing'] = timing.server_timing(total)
+        self.log(request, response, timing, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = _current.get()
+        if timing is not None:
+            timing.view_start = time.perf_counter()
+
+    def log(self, request, response, timing, total):
+        match = request.resolver_match
+        if match is None or match.func.__module__ not in TIMING_LOG_MODULES:
+            return
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'view_ms': round(timing.view_time * 1000, 2),
+            'db_ms': round(timing.stats.db_time * 1000, 2),
+            'queries': timing.stats.queries,
+            'template_ms': round(timing.template_time * 1000, 2),
+        }, ensure_ascii=False))
+
+
+class DuplicateQueryMiddleware:
+    """Log, or raise on, SQL shapes repeated within a request.
+
+    Active when ``BLOG_DUPLICATE_QUERY_THRESHOLD`` is set; a shape run
+    more times than that is reported. With ``BLOG_DUPLICATE_QUERY_RAISE``
+    the request fails with :class:`DuplicateQueriesError`, which is how
+    the test suite catches N+1 regressions.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(settings, 'BLOG_DUPLICATE_QUERY_THRESHOLD', None)
+        if not threshold:
+            return self.get_response(request)
+
+        detector = DuplicateQueryDetector(threshold)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(detector))
+            response = self.get_response(request)
+        duplicates = detector.duplicates()
+        if not duplicates:
+            return response
+
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        report = '\n'.join(
+            f'{count} x {shape}\n  at {code}'
+            + (f' (template {template})' if template else '')
+            for shape, count, code, template in duplicates
+        )
+        duplicates_logger.warning(
+            'Repeated queries in %s:\n%s', view, report
+        )
+        if getattr(settings, 'BLOG_DUPLICATE_QUERY_RAISE', False):
+            raise DuplicateQueriesError(
+                f'Повторяющиеся запросы в {view}:\n{report}'
+            )
+        return response
+
+
+class MetricsMiddleware:
+    """Record latency and status of every request.
+
+    The query count is taken from the :class:`QueryStats` of a request
+    sampled by ``TimingMiddleware``, so put it after that one; other
+    requests run without a query wrapper.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        metrics.REQUEST_DURATION.observe(
+            time.perf_counter() - start, view=view
+        )
+        metrics.RESPONSES.inc(view=view, status=response.status_code)
+        stats = _queries.get()
+        if stats is not None:
+            metrics.SAMPLED_REQUESTS.inc(view=view)
+            metrics.DB_QUERIES.inc(stats.queries, view=view)
+        return response
+
+
+class ReplicaMiddleware:
+    """Pin the reads of a browser to the primary for a while after it wrote.
+
+    Put it before ``SessionMiddleware`` so session writes count too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state, token = routers.begin_request(
+            pinned=routers.PRIMARY_COOKIE in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end_request(token)
+        if state.wrote and routers.get_replicas():
+            response.set_cookie(
+                routers.PRIMARY_COOKIE, '1',
+                max_age=routers.sticky_seconds(),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -2,31 +2,50 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
-from django.db.models import Count
 
 from .constants import (
     CHAR_FIELD_MAX_LENGTH,
     SLUG_MAX_LENGTH,
     STR_MAX_LENGTH,
     MIN_LENGTH_SHORT,
-    MIN_LENGTH_TEXT
+    MIN_LENGTH_TEXT,
+    TASK_MAX_ATTEMPTS
 )
 
 User = get_user_model()
 
 
 class PostQuerySet(models.QuerySet):
-    def filter_published(self):
-        return self.filter(
+    @staticmethod
+    def published_condition():
+        return models.Q(
             pub_date__lte=timezone.now(),
             is_published=True,
             category__is_published=True
         )
 
-    def with_comment_count(self):
+    def filter_published(self):
+        return self.filter(self.published_condition())
+
+    def visible_to(self, user):
+        """Published posts plus every post of ``user`` itself."""
+        if not user.is_authenticated:
+            return self.filter_published()
+        return self.filter(
+            self.published_condition() | models.Q(author=user)
+        )
+
+    def latest_pub_date(self):
+        """Newest ``pub_date`` of the queryset, read from the index."""
+        return self.order_by('-pub_date').values_list(
+            'pub_date', flat=True
+        ).first()
+
+    def with_relations(self):
+        """Newest first, with the relations shown on post cards joined."""
         return self.select_related(
             'author', 'category', 'location'
-        ).annotate(comment_count=Count('comments')).order_by('-pub_date')
+        ).order_by('-pub_date')
 
 
 class CreatedAtAbstract(models.Model):
@@ -68,6 +87,12 @@ class Category(IsPublishedCreatedAtAbstract):
     class Meta(IsPublishedCreatedAtAbstract.Meta):
         verbose_name = 'категория'
         verbose_name_plural = 'Категории'
+        indexes = (
+            models.Index(
+                fields=('is_published',),
+                name='category_is_published_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title[:STR_MAX_LENGTH]
@@ -125,6 +150,17 @@ class Post(IsPublishedCreatedAtAbstract):
         upload_to='posts_images',
         blank=True
     )
+    image_variants = models.JSONField(
+        'Варианты фото',
+        default=dict,
+        blank=True,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     objects = PostQuerySet.as_manager()
 
@@ -133,10 +169,40 @@ class Post(IsPublishedCreatedAtAbstract):
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('is_published', '-pub_date'),
+                name='post_published_pub_date_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date'),
+                name='post_category_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title[:STR_MAX_LENGTH]
 
+    def save(self, *args, **kwargs):
+        # comment_count and image_variants are changed with UPDATE queries
+        # only (counters and the image worker); a full save of an instance
+        # read earlier must not write back stale values.
+        if (
+            not self._state.adding
+            and self.pk is not None
+            and kwargs.get('update_fields') is None
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ('comment_count', 'image_variants')
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(CreatedAtAbstract):
     text = models.TextField(
@@ -157,6 +223,50 @@ class Comment(CreatedAtAbstract):
     class Meta(CreatedAtAbstract.Meta):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx'
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий {self.author} к {self.post}'
+
+
+class Task(CreatedAtAbstract):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField('Задача', max_length=CHAR_FIELD_MAX_LENGTH)
+    args = models.JSONField('Аргументы', default=list, blank=True)
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=TASK_MAX_ATTEMPTS
+    )
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta(CreatedAtAbstract.Meta):
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='task_status_run_at_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,89 @@
+"""Detection of repeated SQL statements (N+1 queries) within a request.
+
+Statements are reduced to their shape, with literals and ``IN`` lists
+collapsed, so ``SELECT ... WHERE id = 1`` and ``... WHERE id = 2`` count
+as the same statement. A shape executed more than ``threshold`` times is
+reported together with the project code and the template that ran it.
+"""
+import re
+import sys
+import traceback
+from collections import Counter
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_RE = re.compile(r'\bIN \((?:\s*(?:%s|\?|\d+|NULL)\s*,?)+\)', re.I)
+_SPACE_RE = re.compile(r'\s+')
+# Transaction control repeats by design.
+_IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+_TEMPLATE_FILE = str(Path(django.__file__).parent / 'template' / 'base.py')
+# Frames of the query instrumentation itself are not an origin.
+_INSTRUMENTATION = {__file__, str(Path(__file__).with_name('middleware.py'))}
+
+
+class DuplicateQueriesError(Exception):
+    pass
+
+
+def normalize(sql):
+    """Return the shape of ``sql``: literals and ``IN`` lists collapsed."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _IN_RE.sub('IN (...)', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def _origin():
+    """Innermost project frame and template of the running query."""
+    project = str(settings.BASE_DIR)
+    code = template = None
+    frame = sys._getframe(2)
+    while frame is not None and (code is None or template is None):
+        filename = frame.f_code.co_filename
+        if (
+            template is None
+            and filename == _TEMPLATE_FILE
+            and frame.f_code.co_name == 'render'
+            and 'self' in frame.f_locals
+        ):
+            origin = getattr(frame.f_locals['self'], 'origin', None)
+            template = getattr(origin, 'template_name', None)
+        elif (
+            code is None
+            and filename.startswith(project)
+            and filename not in _INSTRUMENTATION
+        ):
+            code = traceback.extract_stack(frame, limit=1)[-1]
+        frame = frame.f_back
+    if code is not None:
+        code = f'{code.filename}:{code.lineno} in {code.name}'
+    return code, template
+
+
+class DuplicateQueryDetector:
+    """``execute_wrapper`` that counts statement shapes."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_IGNORED):
+            shape = normalize(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == self.threshold + 1:
+                self.origins[shape] = _origin()
+        return execute(sql, params, many, context)
+
+    def duplicates(self):
+        """Return ``[(shape, count, code, template)]`` over the threshold."""
+        return [
+            (shape, self.counts[shape], *origin)
+            for shape, origin in self.origins.items()
+        ]
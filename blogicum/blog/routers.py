@@ -0,0 +1,126 @@
+"""Routing of the feed and post page reads to read replicas.
+
+Reads go to one of the ``BLOG_READ_REPLICAS`` aliases only inside views
+decorated with :func:`replica_reads`; everything else, and every write,
+uses the primary ``default`` database. A replica may lag behind, so
+reads stay on the primary:
+
+* for the rest of a request once it has written something;
+* for ``BLOG_REPLICA_STICKY_SECONDS`` after a browser's request wrote,
+  which ``blog.middleware.ReplicaMiddleware`` remembers in a cookie, so
+  users see their own posts and comments;
+* for the same time after a cache namespace of the page was bumped, so
+  a stale replica read is not stored in the page cache for everyone.
+
+To try it locally with two SQLite files, copy the database and add the
+copy as a replica::
+
+    sqlite3 db.sqlite3 ".backup replica.sqlite3"
+
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    BLOG_READ_REPLICAS = ['replica']
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from . import caching
+from .constants import REPLICA_STICKY_SECONDS
+
+PRIMARY_COOKIE = 'blog_primary'
+
+_current = ContextVar('blog_replica_state', default=None)
+
+
+class RequestState:
+    def __init__(self, pinned=False):
+        # Reads of this request must see the primary.
+        self.pinned = pinned
+        self.wrote = False
+        self.replica_reads = False
+
+
+def get_replicas():
+    return getattr(settings, 'BLOG_READ_REPLICAS', ())
+
+
+def sticky_seconds():
+    return getattr(
+        settings, 'BLOG_REPLICA_STICKY_SECONDS', REPLICA_STICKY_SECONDS
+    )
+
+
+def begin_request(pinned):
+    """Track a request; return the state and a token for ``end_request``."""
+    state = RequestState(pinned)
+    return state, _current.set(state)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def replica_reads(*namespaces):
+    """Let a view read from a replica.
+
+    ``namespaces`` are format strings filled with the view keyword
+    arguments, as in :func:`blog.caching.cache_anonymous_page`.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            state = _current.get()
+            if state is None or state.pinned or not get_replicas():
+                return view(request, *args, **kwargs)
+            changed = max(caching.get_versions('site', *(
+                namespace.format(**kwargs) for namespace in namespaces
+            ))) / 10 ** 9
+            if time.time() - changed < sticky_seconds():
+                return view(request, *args, **kwargs)
+            state.replica_reads = True
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                state.replica_reads = False
+        return wrapper
+    return decorator
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        replicas = get_replicas()
+        if (
+            state is not None
+            and state.replica_reads
+            and not state.pinned
+            and replicas
+        ):
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated themselves.
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,407 @@
+"""Full-text search over post titles and texts.
+
+The search goes through a backend chosen by ``BLOG_SEARCH_BACKEND`` (a
+dotted path). By default :class:`FTS5Backend` is used when the database
+is SQLite with FTS5, and :class:`InvertedIndexBackend` otherwise.
+
+The FTS5 backend indexes posts in ``blog_post_fts``, kept in sync with
+``blog_post`` by triggers, so ``bulk_create`` and queryset updates are
+indexed too. The table and triggers are (re)created after every
+``migrate`` because SQLite drops triggers when a migration rebuilds
+``blog_post``.
+
+The inverted index lives in process memory. It is built on first use,
+updated from Post signals in the process that saved the post, and
+rebuilt in the background once it is older than
+``BLOG_SEARCH_INDEX_MAX_AGE`` to pick up writes made by other processes.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Case, IntegerField, When
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from .constants import (
+    SEARCH_INDEX_MAX_AGE, SEARCH_INDEX_MAX_POSTINGS, SEARCH_MAX_RESULTS
+)
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'blog_post_fts'
+TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        'AFTER INSERT ON blog_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, title, text) '
+        'VALUES (new.id, new.title, new.text); END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        'AFTER DELETE ON blog_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) '
+        "VALUES ('delete', old.id, old.title, old.text); END"
+    ),
+    f'{FTS_TABLE}_au': (
+        'AFTER UPDATE OF title, text ON blog_post BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, text) '
+        "VALUES ('delete', old.id, old.title, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, title, text) '
+        'VALUES (new.id, new.title, new.text); END'
+    ),
+}
+# Matches in the title weigh more than matches in the text.
+TITLE_WEIGHT = 10
+RANK = f'bm25({FTS_TABLE}, {TITLE_WEIGHT}.0, 1.0)'
+WORD_RE = re.compile(r'\w+')
+
+
+def ensure_fts_index(using_connection=connection):
+    """Create the FTS table and triggers if missing; return availability."""
+    if using_connection.vendor != 'sqlite':
+        return False
+    with using_connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                "title, text, content='blog_post', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND name IN (%s)' % ', '.join(['%s'] * len(TRIGGERS)),
+            list(TRIGGERS),
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing != set(TRIGGERS):
+            for name, body in TRIGGERS.items():
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+                cursor.execute(f'CREATE TRIGGER {name} {body}')
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+    return True
+
+
+class BaseSearchBackend:
+    def search(self, posts, query):
+        """Filter ``posts`` by ``query``, best matches first."""
+        raise NotImplementedError
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class FTS5Backend(BaseSearchBackend):
+    @staticmethod
+    def available():
+        if connection.vendor != 'sqlite':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = %s",
+                [FTS_TABLE],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def parse_query(query):
+        """Turn free user input into an FTS5 query of prefix terms."""
+        words = WORD_RE.findall(query.lower())
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def search(self, posts, query):
+        if not WORD_RE.search(query):
+            return posts.none()
+        # A plain join lets FTS5 drive the query: the MATCH yields the
+        # matching rowids and their bm25 rank once, then posts are looked
+        # up by primary key.
+        return posts.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = blog_post.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[self.parse_query(query)],
+            select={'rank': RANK},
+            order_by=['rank', '-pub_date'],
+        )
+
+
+_stemmer = snowballstemmer.stemmer('russian')
+_stemmer_lock = threading.Lock()
+
+
+@lru_cache(maxsize=100_000)
+def stem(word):
+    with _stemmer_lock:
+        return sys.intern(_stemmer.stemWord(word.lower()))
+
+
+def terms(text):
+    return {stem(word) for word in WORD_RE.findall(text)}
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    """Stemmed in-memory inverted index over post titles and texts.
+
+    Postings are compact arrays of post ids, separately for titles and
+    texts. At most ``BLOG_SEARCH_INDEX_MAX_POSTINGS`` live postings are
+    kept; when the corpus is larger only the newest posts are indexed, and
+    posts indexed later evict the ones indexed longest ago.
+
+    Removing a post only forgets its terms in ``doc_terms``; its postings
+    stay in the arrays as dead entries skipped by :meth:`rank` until a
+    rebuild, or until there are more than half as many of them as the
+    limit and the arrays are compacted.
+    """
+
+    def __init__(self, max_postings=None, max_age=None):
+        self.max_postings = max_postings or getattr(
+            settings, 'BLOG_SEARCH_INDEX_MAX_POSTINGS',
+            SEARCH_INDEX_MAX_POSTINGS
+        )
+        self.max_age = max_age or getattr(
+            settings, 'BLOG_SEARCH_INDEX_MAX_AGE', SEARCH_INDEX_MAX_AGE
+        )
+        self._lock = threading.RLock()
+        self._refreshing = False
+        self._reset()
+
+    def _reset(self):
+        self.title_postings = {}
+        self.text_postings = {}
+        # Most recently indexed posts first, so eviction pops the end.
+        self.doc_terms = OrderedDict()
+        self.postings = 0
+        self.dead_postings = 0
+        self.complete = True
+        self.built_at = None
+        self.build_seconds = None
+
+    def _add(self, post_id, title, text):
+        title_terms = terms(title)
+        text_terms = terms(text)
+        for term in title_terms:
+            self.title_postings.setdefault(term, array('q')).append(post_id)
+        for term in text_terms:
+            self.text_postings.setdefault(term, array('q')).append(post_id)
+        self.doc_terms[post_id] = (
+            frozenset(title_terms), frozenset(text_terms)
+        )
+        self.postings += len(title_terms) + len(text_terms)
+
+    def _remove(self, post_id):
+        title_terms, text_terms = self.doc_terms.pop(post_id, ((), ()))
+        count = len(title_terms) + len(text_terms)
+        self.postings -= count
+        self.dead_postings += count
+        if self.dead_postings > self.max_postings // 2:
+            self._compact()
+
+    def _evict(self):
+        self._remove(next(reversed(self.doc_terms)))
+
+    def _live_ids(self, postings, term, field):
+        ids = postings.get(term, ())
+        if not self.dead_postings:
+            return ids
+        doc_terms = self.doc_terms
+        return [
+            post_id for post_id in ids
+            if post_id in doc_terms and term in doc_terms[post_id][field]
+        ]
+
+    def _compact(self):
+        for field, postings in enumerate(
+            (self.title_postings, self.text_postings)
+        ):
+            for term in list(postings):
+                # dict.fromkeys drops the ids of posts indexed again.
+                ids = array('q', dict.fromkeys(
+                    self._live_ids(postings, term, field)
+                ))
+                if ids:
+                    postings[term] = ids
+                else:
+                    del postings[term]
+        self.dead_postings = 0
+
+    def build(self):
+        from .models import Post
+
+        start = time.perf_counter()
+        with self._lock:
+            self._reset()
+            rows = Post.objects.order_by('-id').values_list(
+                'id', 'title', 'text'
+            ).iterator(chunk_size=2000)
+            for post_id, title, text in rows:
+                if self.postings >= self.max_postings:
+                    self.complete = False
+                    break
+                self._add(post_id, title, text)
+            self.built_at = time.monotonic()
+            self.build_seconds = time.perf_counter() - start
+        logger.info('Search index built: %s', self.stats())
+
+    def _ensure_fresh(self):
+        if self.built_at is None:
+            self.build()
+        elif (
+            time.monotonic() - self.built_at > self.max_age
+            and not self._refreshing
+        ):
+            self._refreshing = True
+            threading.Thread(
+                target=self._refresh, name='blog-search-index', daemon=True
+            ).start()
+
+    def _refresh(self):
+        from django.db import close_old_connections
+
+        try:
+            fresh = type(self)(self.max_postings, self.max_age)
+            fresh.build()
+            with self._lock:
+                self.__dict__.update({
+                    key: value for key, value in fresh.__dict__.items()
+                    if key not in ('_lock', '_refreshing')
+                })
+        finally:
+            self._refreshing = False
+            close_old_connections()
+
+    def index_post(self, post):
+        with self._lock:
+            if self.built_at is None:
+                return
+            self._remove(post.pk)
+            self._add(post.pk, post.title, post.text)
+            self.doc_terms.move_to_end(post.pk, last=False)
+            while self.postings > self.max_postings:
+                self._evict()
+                self.complete = False
+
+    def remove_post(self, post_id):
+        with self._lock:
+            if self.built_at is not None:
+                self._remove(post_id)
+
+    def rank(self, query):
+        """Return post ids matching every query term, best first."""
+        self._ensure_fresh()
+        query_terms = terms(query)
+        if not query_terms:
+            return []
+        with self._lock:
+            scores = None
+            for term in query_terms:
+                term_scores = dict.fromkeys(
+                    self._live_ids(self.text_postings, term, 1), 1
+                )
+                for post_id in self._live_ids(self.title_postings, term, 0):
+                    term_scores[post_id] = TITLE_WEIGHT
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        post_id: score + term_scores[post_id]
+                        for post_id, score in scores.items()
+                        if post_id in term_scores
+                    }
+        return sorted(
+            scores, key=lambda post_id: (-scores[post_id], -post_id)
+        )
+
+    def search(self, posts, query):
+        # Hidden posts are dropped before the cut to SEARCH_MAX_RESULTS,
+        # so they cannot push visible matches out of the results.
+        ranked = self.rank(query)
+        visible = []
+        for start in range(0, len(ranked), SEARCH_MAX_RESULTS):
+            chunk = ranked[start:start + SEARCH_MAX_RESULTS]
+            found = set(
+                posts.filter(id__in=chunk).values_list('id', flat=True)
+            )
+            visible += [post_id for post_id in chunk if post_id in found]
+            if len(visible) >= SEARCH_MAX_RESULTS:
+                break
+        visible = visible[:SEARCH_MAX_RESULTS]
+        if not visible:
+            return posts.none()
+        return posts.filter(id__in=visible).order_by(Case(
+            *(When(id=post_id, then=position)
+              for position, post_id in enumerate(visible)),
+            output_field=IntegerField(),
+        ))
+
+    def stats(self):
+        with self._lock:
+            size = sum(
+                sys.getsizeof(ids)
+                for postings in (self.title_postings, self.text_postings)
+                for ids in postings.values()
+            ) + sys.getsizeof(self.title_postings) + sys.getsizeof(
+                self.text_postings
+            ) + sys.getsizeof(self.doc_terms)
+            return {
+                'documents': len(self.doc_terms),
+                'terms': len(
+                    self.title_postings.keys() | self.text_postings.keys()
+                ),
+                'postings': self.postings,
+                'dead_postings': self.dead_postings,
+                'bytes': size,
+                'complete': self.complete,
+                'build_seconds': self.build_seconds,
+            }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+            if path:
+                _backend = import_string(path)()
+            elif FTS5Backend.available():
+                _backend = FTS5Backend()
+            else:
+                _backend = InvertedIndexBackend()
+        return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting.startswith('BLOG_SEARCH_'):
+        _backend = None
+
+
+def search_posts(posts, query):
+    """Filter ``posts`` by ``query``, best matches first."""
+    if not WORD_RE.search(query):
+        return posts.none()
+    return get_backend().search(posts, query)
@@ -1,9 +1,228 @@
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+from . import caching
+from .constants import (
+    COMMENTS_PER_PAGE, COUNT_CACHE_TIMEOUT, POSTS_PER_PAGE
+)
+from .models import Comment, Post
+
+CURSOR_SALT = 'blog.services.cursor'
+
+
+class KeysetPage(Sequence):
+    """Page of objects positioned by an opaque ``(timestamp, id)`` cursor."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Keyset page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+
+class KeysetPaginator:
+    """Paginate by ``(field, id)`` without COUNT and OFFSET.
+
+    Posts are paged newest first by ``pub_date``, comments oldest first by
+    ``created_at``. Every page is fetched with a range condition on the
+    last seen key, so its cost does not depend on how deep the reader has
+    scrolled.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date',
+                 descending=True):
+        self.field = field
+        self.descending = descending
+        self.object_list = object_list.order_by(*self._ordering(descending))
+        self.per_page = int(per_page)
+
+    def _ordering(self, descending):
+        sign = '-' if descending else ''
+        return f'{sign}{self.field}', f'{sign}id'
+
+    def _after(self, value, pk, descending):
+        lookup = 'lt' if descending else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'id__{lookup}': pk})
+        )
 
-from .constants import POSTS_PER_PAGE
+    def encode_cursor(self, obj, direction):
+        return signing.dumps(
+            (getattr(obj, self.field).isoformat(), obj.id, direction),
+            salt=CURSOR_SALT,
+            compress=True,
+        )
 
+    @staticmethod
+    def decode_cursor(cursor):
+        """Return ``(timestamp, id, direction)`` or None for a bad token."""
+        try:
+            value, pk, direction = signing.loads(cursor, salt=CURSOR_SALT)
+            return datetime.fromisoformat(value), int(pk), direction
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
 
-def paginate_posts(request, posts, per_page=POSTS_PER_PAGE):
-    paginator = Paginator(posts, per_page)
+    def get_page(self, cursor):
+        position = self.decode_cursor(cursor) if cursor else None
+        if position is None:
+            items = list(self.object_list[:self.per_page + 1])
+            return KeysetPage(
+                items[:self.per_page], self,
+                has_next=len(items) > self.per_page,
+                has_previous=False,
+            )
+
+        value, pk, direction = position
+        if direction == 'prev':
+            backwards = not self.descending
+            items = list(
+                self.object_list.filter(
+                    self._after(value, pk, backwards)
+                ).order_by(*self._ordering(backwards))[:self.per_page + 1]
+            )
+            return KeysetPage(
+                items[:self.per_page][::-1], self,
+                has_next=True,
+                has_previous=len(items) > self.per_page,
+            )
+
+        items = list(
+            self.object_list.filter(
+                self._after(value, pk, self.descending)
+            )[:self.per_page + 1]
+        )
+        return KeysetPage(
+            items[:self.per_page], self,
+            has_next=len(items) > self.per_page,
+            has_previous=True,
+        )
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that takes the total number of posts from the cache.
+
+    The count is stored per feed in its list namespace and dropped
+    whenever a post of that feed is saved or deleted, but not on comments;
+    ``BLOG_COUNT_CACHE_TIMEOUT`` bounds how stale it may get otherwise,
+    e.g. when scheduled posts become visible.
+    """
+
+    def __init__(self, object_list, per_page, feed, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+
+    @cached_property
+    def count(self):
+        key = caching.make_key(
+            f'count:{self.feed}', caching.list_namespace(self.feed)
+        )
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout=getattr(
+                settings, 'BLOG_COUNT_CACHE_TIMEOUT', COUNT_CACHE_TIMEOUT
+            ))
+        return count
+
+
+def paginate_posts(request, posts, per_page=POSTS_PER_PAGE, feed=None):
+    if getattr(settings, 'BLOG_KEYSET_PAGINATION', False):
+        paginator = KeysetPaginator(posts, per_page)
+        return paginator.get_page(request.GET.get('cursor'))
+    if feed is None:
+        paginator = Paginator(posts, per_page)
+    else:
+        paginator = CachedCountPaginator(posts, per_page, feed)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def paginate_search(request, results, per_page=POSTS_PER_PAGE):
+    """Paginate ranked search results, which cannot use keyset cursors."""
+    paginator = Paginator(results, per_page)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def paginate_comments(request, comments, per_page=COMMENTS_PER_PAGE):
+    paginator = KeysetPaginator(
+        comments, per_page, field='created_at', descending=False
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def _comment_total():
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    return Coalesce(
+        Subquery(
+            comments.values('post').annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def recount_posts(pks):
+    """Recompute ``Post.comment_count`` of the posts with ``pks``."""
+    Post.objects.filter(pk__in=pks).update(comment_count=_comment_total())
+
+
+def recount_comments(batch_size=10000):
+    """Recompute ``Post.comment_count`` in batches of primary keys.
+
+    Yields the number of posts processed so far after every batch.
+    """
+    total = _comment_total()
+    last_pk = 0
+    done = 0
+    while True:
+        pks = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return
+        Post.objects.filter(pk__in=pks).update(comment_count=total)
+        last_pk = pks[-1]
+        done += len(pks)
+        yield done
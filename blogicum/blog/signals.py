@@ -0,0 +1,209 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import F, QuerySet
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import caching, images, metrics, search
+from .models import Category, Comment, Location, Post
+from .services import recount_posts
+
+User = get_user_model()
+
+# User fields shown next to posts and comments on every page, and fields
+# shown on the profile page only.
+SITE_USER_FIELDS = {'username'}
+PROFILE_USER_FIELDS = {'first_name', 'last_name', 'is_staff'}
+
+
+def origin_model(origin):
+    """Model whose delete started a cascade, for instances and querysets."""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin)
+
+
+def setup_search_index(sender, using, **kwargs):
+    search.ensure_fts_index(connections[using])
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_relations(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None:
+        previous = Post.objects.filter(pk=instance.pk).values(
+            'category__slug', 'author__username', 'image', 'image_variants'
+        ).first()
+    instance._previous_relations = previous or {}
+    instance._image_changed = (
+        instance.image.name or ''
+    ) != (previous or {}).get('image', '')
+    if instance._image_changed:
+        instance.image_variants = {}
+
+
+@receiver(post_save, sender=Post)
+def schedule_image_variants(sender, instance, update_fields=None, **kwargs):
+    if not getattr(instance, '_image_changed', False):
+        return
+    if update_fields is not None and 'image_variants' not in update_fields:
+        Post.objects.filter(pk=instance.pk).update(image_variants={})
+    old_variants = instance._previous_relations.get('image_variants')
+    if old_variants:
+        images.delete_variants.delay(old_variants)
+    if instance.image:
+        images.process_post_image.delay(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_relations', {})
+    category = instance.category if instance.category_id else None
+    caching.bump(*caching.post_namespaces(
+        category_slugs=(
+            category and category.slug, previous.get('category__slug')
+        ),
+        usernames=(
+            instance.author.username, previous.get('author__username')
+        ),
+        post_ids=(instance.pk,),
+    ))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_posts_pages(sender, instance, origin=None, **kwargs):
+    # A queryset delete reads the pages of all its posts in one query.
+    if isinstance(origin, QuerySet) and not hasattr(origin, '_namespaces'):
+        origin._namespaces = caching.queryset_namespaces(origin)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, origin=None, **kwargs):
+    if issubclass(origin_model(origin), User):
+        # invalidate_deleted_user_pages bumps the whole site.
+        return
+    if isinstance(origin, QuerySet):
+        namespaces = origin.__dict__.pop('_namespaces', None)
+        if namespaces:
+            caching.bump(*namespaces)
+        return
+    invalidate_post_pages(sender, instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_site(sender, instance, **kwargs):
+    caching.bump('site')
+
+
+@receiver(pre_save, sender=User)
+def remember_user_fields(sender, instance, update_fields=None, **kwargs):
+    fields = SITE_USER_FIELDS | PROFILE_USER_FIELDS
+    if update_fields is not None:
+        fields &= set(update_fields)
+    previous = None
+    if instance.pk is not None and fields:
+        previous = User.objects.filter(pk=instance.pk).values(
+            *fields
+        ).first()
+    instance._previous_fields = previous or {}
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_pages(sender, instance, created, **kwargs):
+    if created:
+        return
+    changed = {
+        name for name, value in instance._previous_fields.items()
+        if getattr(instance, name) != value
+    }
+    if changed & SITE_USER_FIELDS:
+        caching.bump('site')
+    elif changed:
+        caching.bump(f'author:{instance.username}')
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_pages(sender, instance, **kwargs):
+    caching.bump('site')
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(pre_delete, sender=User)
+def remember_commented_posts(sender, instance, **kwargs):
+    instance._commented_posts = list(
+        Comment.objects.filter(author=instance).exclude(
+            post__author=instance
+        ).values_list('post_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def recount_commented_posts(sender, instance, **kwargs):
+    posts = getattr(instance, '_commented_posts', None)
+    if posts:
+        recount_posts(posts)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, origin=None, **kwargs):
+    # The comments of a deleted post go away together with its counter;
+    # the posts commented by a deleted user are recounted at once.
+    if issubclass(origin_model(origin), (Post, User)):
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, origin=None, **kwargs):
+    # Deleting a post or a user invalidates the pages of its comments.
+    if issubclass(origin_model(origin), (Post, User)):
+        return
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'category__slug', 'author__username'
+    ).first() or {}
+    caching.bump(*caching.post_namespaces(
+        category_slugs=(post.get('category__slug'),),
+        usernames=(post.get('author__username'),),
+        post_ids=(instance.post_id,),
+        lists=False,
+    ))
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def count_saves(sender, instance, created, **kwargs):
+    metrics.WRITES.inc(
+        model=sender._meta.model_name,
+        action='created' if created else 'updated',
+    )
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def count_deletes(sender, instance, **kwargs):
+    metrics.WRITES.inc(model=sender._meta.model_name, action='deleted')
@@ -0,0 +1,108 @@
+"""Database-backed queue for work that should not run inside a request.
+
+Functions decorated with :func:`task` get a ``delay(*args)`` method that
+stores a :class:`~blog.models.Task` row in the current transaction, so a
+task only becomes visible to workers once the data it refers to is
+committed. Workers started by ``manage.py run_workers`` claim rows with a
+conditional UPDATE, which works on SQLite as well as on databases with
+row locks, and retry failed tasks with exponential backoff.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .constants import TASK_LOCK_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func):
+    name = f'{func.__module__}.{func.__name__}'
+    registry[name] = func
+    func.delay = partial(enqueue, name)
+    return func
+
+
+def enqueue(name, *args):
+    if getattr(settings, 'BLOG_TASKS_EAGER', False):
+        transaction.on_commit(partial(registry[name], *args))
+        return None
+    from .models import Task
+
+    return Task.objects.create(name=name, args=list(args))
+
+
+def claim():
+    """Mark the next due task as running and return it, or None."""
+    from .models import Task
+
+    now = timezone.now()
+    abandoned = now - timedelta(seconds=TASK_LOCK_TIMEOUT)
+    candidates = Task.objects.filter(
+        Q(status=Task.Status.PENDING, run_at__lte=now)
+        | Q(status=Task.Status.RUNNING, locked_at__lt=abandoned)
+    ).order_by('run_at').values_list('pk', 'status')[:10]
+    for pk, status in candidates:
+        claimed = Task.objects.filter(pk=pk, status=status).exclude(
+            status=Task.Status.RUNNING, locked_at__gte=abandoned
+        ).update(
+            status=Task.Status.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def execute(task_obj):
+    from .models import Task
+
+    try:
+        registry[task_obj.name](*task_obj.args)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Task %s failed', task_obj)
+        if task_obj.attempts >= task_obj.max_attempts:
+            Task.objects.filter(pk=task_obj.pk).update(
+                status=Task.Status.FAILED, last_error=error
+            )
+        else:
+            Task.objects.filter(pk=task_obj.pk).update(
+                status=Task.Status.PENDING,
+                run_at=timezone.now() + timedelta(
+                    seconds=2 ** task_obj.attempts
+                ),
+                last_error=error,
+            )
+        return False
+    Task.objects.filter(pk=task_obj.pk).delete()
+    return True
+
+
+def run_next():
+    """Run one due task; return False when the queue had nothing to do."""
+    task_obj = claim()
+    if task_obj is None:
+        return False
+    execute(task_obj)
+    return True
+
+
+def work(poll_interval=1.0, once=False, should_stop=lambda: False):
+    while not should_stop():
+        close_old_connections()
+        if run_next():
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
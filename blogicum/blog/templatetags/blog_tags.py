@@ -0,0 +1,30 @@
+from django import template
+
+from blog import caching
+from blog.constants import IMAGE_FORMATS
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_key(post):
+    """Version stamp of a post card, changed by any edit it displays."""
+    return caching.make_key(f'post-card:{post.pk}', f'post:{post.pk}')
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, variant):
+    """Render ``post.image`` with its generated variants when available."""
+    storage = post.image.storage
+    variants = post.image_variants or {}
+    srcset = {
+        extension: ', '.join(
+            f'{storage.url(item[extension])} {item["width"]}w'
+            for item in variants.values()
+        )
+        for extension in IMAGE_FORMATS
+    } if variants else {}
+    src = post.image.url
+    if variant in variants:
+        src = storage.url(variants[variant]['jpg'])
+    return {'post': post, 'src': src, 'srcset': srcset}
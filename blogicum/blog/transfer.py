@@ -0,0 +1,152 @@
+"""Streaming export and import of blog content as NDJSON.
+
+Every line is one object in the shape of a Django fixture entry::
+
+    {"model": "blog.post", "pk": 1, "fields": {"author": 3, ...}}
+
+Objects are read and written one chunk at a time, so memory use does
+not depend on the size of the dataset. Foreign keys are stored as raw
+ids and checked once after the import, so the lines may come in any
+order.
+"""
+import datetime
+import json
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from . import caching
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+# Referenced models come first, so an export never needs forward refs.
+MODELS = (User, Category, Location, Post, Comment)
+
+
+class Encoder(DjangoJSONEncoder):
+    """Keep microseconds, which ``DjangoJSONEncoder`` truncates."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _fields(model):
+    return [field for field in model._meta.concrete_fields
+            if not field.primary_key]
+
+
+def export_records(stream, batch_size=2000):
+    """Write all blog objects to ``stream``.
+
+    Yields the number of objects written so far after every batch.
+    """
+    done = 0
+    for model in MODELS:
+        label = model._meta.label_lower
+        fields = _fields(model)
+        names = [field.name for field in fields]
+        rows = model._base_manager.order_by('pk').values_list(
+            'pk', *(field.attname for field in fields)
+        ).iterator(chunk_size=batch_size)
+        for pk, *values in rows:
+            stream.write(json.dumps(
+                {'model': label, 'pk': pk, 'fields': dict(zip(names, values))},
+                cls=Encoder, ensure_ascii=False
+            ) + '\n')
+            done += 1
+            if done % batch_size == 0:
+                yield done
+    yield done
+
+
+@contextmanager
+def raw_dates():
+    """Stop ``auto_now`` fields from overwriting dates set on objects."""
+    fields = [
+        field for model in MODELS for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _build(model, record):
+    obj = model(pk=record['pk'])
+    for name, value in record['fields'].items():
+        field = model._meta.get_field(name)
+        setattr(obj, field.attname, field.to_python(value))
+    return obj
+
+
+def _flush(model, objs, replay=False):
+    # Conflicts are only ignored in a replayed batch, which an interrupted
+    # run may have committed right before recording its progress. Anywhere
+    # else they mean the database already has other objects with these
+    # keys, and skipping them would attach the imported rows to those.
+    with transaction.atomic():
+        model._base_manager.bulk_create(objs, ignore_conflicts=replay)
+
+
+def _finish():
+    connection.check_constraints(
+        table_names=[model._meta.db_table for model in MODELS]
+    )
+    statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    caching.bump('site')
+
+
+def import_records(stream, batch_size=2000, skip=0, resume=False):
+    """Load objects written by :func:`export_records` from ``stream``.
+
+    The first ``skip`` lines are ignored. Every batch is committed in its
+    own transaction; after each one the number of lines read so far is
+    yielded, which is the ``skip`` to resume from. With ``resume`` the
+    first batch may already be in the database and its existing objects
+    are skipped; any other conflict raises ``IntegrityError``.
+    """
+    objs = []
+    model = None
+    replay = resume
+    line_number = 0
+    with connection.constraint_checks_disabled(), raw_dates():
+        for line_number, line in enumerate(stream, 1):
+            if line_number <= skip or not line.strip():
+                continue
+            record = json.loads(line)
+            record_model = apps.get_model(record['model'])
+            if record_model not in MODELS:
+                raise ValueError(
+                    f'Строка {line_number}: неизвестная модель '
+                    f'{record["model"]}.'
+                )
+            if objs and (
+                record_model is not model or len(objs) >= batch_size
+            ):
+                _flush(model, objs, replay)
+                replay = False
+                yield line_number - 1
+                objs = []
+            model = record_model
+            objs.append(_build(model, record))
+        if objs:
+            _flush(model, objs, replay)
+        yield line_number
+    _finish()
@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
@@ -9,6 +9,18 @@ urlpatterns = [
         '',
         views.index, name='index'
     ),
+    path(
+        'search/',
+        views.search, name='search'
+    ),
+    path(
+        'feed/rss/',
+        feeds.latest_rss, name='feed_rss'
+    ),
+    path(
+        'feed/atom/',
+        feeds.latest_atom, name='feed_atom'
+    ),
     path(
         'posts/<int:post_id>/',
         views.post_detail, name='post_detail'
@@ -17,6 +29,14 @@ urlpatterns = [
         'category/<slug:category_slug>/',
         views.category_posts, name='category_posts'
     ),
+    path(
+        'category/<slug:category_slug>/rss/',
+        feeds.category_rss, name='category_rss'
+    ),
+    path(
+        'category/<slug:category_slug>/atom/',
+        feeds.category_atom, name='category_atom'
+    ),
     path(
         'profile/edit/',
         views.profile_edit, name='edit_profile'
@@ -25,6 +45,14 @@ urlpatterns = [
         'profile/<str:username>/',
         views.profile, name='profile'
     ),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.author_rss, name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom, name='profile_atom'
+    ),
     path(
         'posts/create/',
         views.post_create, name='create_post'
@@ -37,6 +65,10 @@ urlpatterns = [
         'posts/<int:post_id>/delete/',
         views.post_delete, name='delete_post'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments, name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment, name='add_comment'
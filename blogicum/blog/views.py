@@ -1,28 +1,56 @@
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 
+from .caching import cache_anonymous_page, conditional_page
 from .models import Category, Post, Comment
 from .forms import PostForm, CommentForm, UserUpdateForm
-from .services import paginate_posts
+from .routers import replica_reads
+from .search import search_posts
+from .services import paginate_comments, paginate_posts, paginate_search
 
 User = get_user_model()
 
 
+@replica_reads('index')
+@conditional_page('index', posts=Post.objects.filter_published)
+@cache_anonymous_page('index')
 def index(request):
-    post_list = Post.objects.filter_published().with_comment_count()
-    page_obj = paginate_posts(request, post_list)
+    post_list = Post.objects.filter_published().with_relations()
+    page_obj = paginate_posts(request, post_list, feed='index')
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+@cache_anonymous_page('index')
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        posts = search_posts(
+            Post.objects.filter_published().with_relations(), query
+        )
+        page_obj = paginate_search(request, posts)
+    return render(request, 'blog/search.html', {
+        'query': query,
+        'page_obj': page_obj
+    })
 
-    if post.author != request.user:
-        post = get_object_or_404(Post.objects.filter_published(), id=post_id)
 
+@replica_reads('post:{post_id}')
+@conditional_page('post:{post_id}')
+@cache_anonymous_page('post:{post_id}')
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.visible_to(request.user).select_related(
+            'author', 'category', 'location'
+        ),
+        id=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.select_related('author')
+    comments = paginate_comments(
+        request, post.comments.select_related('author')
+    )
 
     return render(request, 'blog/detail.html', {
         'post': post,
@@ -31,14 +59,55 @@ def post_detail(request, post_id):
     })
 
 
+@conditional_page('post:{post_id}')
+@cache_anonymous_page('post:{post_id}')
+def post_comments(request, post_id):
+    post = get_object_or_404(
+        Post.objects.visible_to(request.user).select_related('author'),
+        id=post_id
+    )
+    comments = paginate_comments(
+        request, post.comments.select_related('author')
+    )
+    # The format comes from the URL only: the page cache is keyed by it.
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created_at': comment.created_at.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
+    return render(request, 'includes/comments.html', {
+        'post': post,
+        'comments': comments,
+        'fragment': True
+    })
+
+
+@replica_reads('category:{category_slug}')
+@conditional_page(
+    'category:{category_slug}',
+    posts=lambda category_slug: Post.objects.filter_published().filter(
+        category__slug=category_slug
+    )
+)
+@cache_anonymous_page('category:{category_slug}')
 def category_posts(request, category_slug):
     category = get_object_or_404(
         Category,
         slug=category_slug,
         is_published=True
     )
-    post_list = category.posts.filter_published().with_comment_count()
-    page_obj = paginate_posts(request, post_list)
+    post_list = category.posts.filter_published().with_relations()
+    page_obj = paginate_posts(
+        request, post_list, feed=f'category:{category.slug}'
+    )
 
     return render(
         request,
@@ -47,14 +116,24 @@ def category_posts(request, category_slug):
     )
 
 
+@replica_reads('author:{username}')
+@conditional_page(
+    'author:{username}',
+    posts=lambda username: Post.objects.filter_published().filter(
+        author__username=username
+    )
+)
+@cache_anonymous_page('author:{username}')
 def profile(request, username):
     profile_user = get_object_or_404(User, username=username)
-    posts = profile_user.posts.with_comment_count()
+    posts = profile_user.posts.with_relations()
+    feed = None
 
     if request.user != profile_user:
         posts = posts.filter_published()
+        feed = f'author:{profile_user.username}'
 
-    page_obj = paginate_posts(request, posts)
+    page_obj = paginate_posts(request, posts, feed=feed)
 
     return render(request, 'blog/profile.html', {
         'profile': profile_user,
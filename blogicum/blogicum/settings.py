@@ -21,6 +21,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.TimingMiddleware',
+    'blog.middleware.MetricsMiddleware',
+    'blog.middleware.DuplicateQueryMiddleware',
+    'blog.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,9 +60,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so a write
+            # after a read waits for busy_timeout instead of failing.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -115,3 +126,75 @@ CSRF_USE_SESSIONS = False
 CSRF_COOKIE_HTTPONLY = False
 
 CSRF_COOKIE_SECURE = False
+
+# Switch the feeds from page numbers to (pub_date, id) cursors.
+BLOG_KEYSET_PAGINATION = False
+
+# Upper bound in seconds on how stale cached feed post counts may get.
+BLOG_COUNT_CACHE_TIMEOUT = 60
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Seconds anonymous feed and post pages are served from the cache;
+# 0 disables the page cache.
+BLOG_PAGE_CACHE_TIMEOUT = 300
+
+# Run background tasks in-process after commit instead of queueing them
+# for ``manage.py run_workers``.
+BLOG_TASKS_EAGER = False
+
+# Dotted path of the search backend; by default FTS5 on SQLite and an
+# in-memory inverted index elsewhere.
+BLOG_SEARCH_BACKEND = None
+
+# Share of requests measured by blog.middleware.TimingMiddleware, from 0
+# (off) to 1 (every request); the blog_db_queries metric counts the
+# queries of these requests only.
+BLOG_TIMING_SAMPLE_RATE = 1.0
+
+# Report SQL statements run more than this many times in one request
+# (N+1 queries) on the blog.querycheck logger; None turns the check off.
+BLOG_DUPLICATE_QUERY_THRESHOLD = None
+# Fail such requests with blog.querycheck.DuplicateQueriesError instead.
+BLOG_DUPLICATE_QUERY_RAISE = False
+
+# Directory where every worker process dumps its metrics for /metrics to
+# sum them; None keeps the metrics of each process to itself.
+BLOG_METRICS_DIR = None
+# Bearer token required by /metrics; without it only staff can read it.
+BLOG_METRICS_TOKEN = None
+
+# PRAGMA name -> value run on every new SQLite connection, replacing
+# blog.constants.SQLITE_PRAGMAS (WAL, busy timeout...); {} runs none.
+BLOG_SQLITE_PRAGMAS = None
+
+# Aliases of DATABASES serving the reads of the feed and post pages; see
+# blog.routers. Empty sends every query to the default database.
+BLOG_READ_REPLICAS = []
+# Seconds reads stay on the default database after a browser wrote or a
+# page changed.
+BLOG_REPLICA_STICKY_SECONDS = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'blog.querycheck': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
@@ -3,12 +3,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from blog.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/', include('blog.urls_auth')),
     path('', include('blog.urls')),
     path('pages/', include('pages.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 handler403 = 'pages.views.csrf_failure'
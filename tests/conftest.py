@@ -29,6 +29,7 @@ from mixer.backend.django import mixer as _mixer
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
+DUPLICATE_QUERY_THRESHOLD = 3
 
 KeyVal = NamedTuple("KeyVal", [("key", Optional[str]), ("val", Optional[str])])
 UrlRepr = NamedTuple("UrlRepr", [("url", str), ("repr", str)])
@@ -41,6 +42,31 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def detect_duplicate_queries(request, settings):
+    """Fail requests that repeat an SQL statement (N+1 queries).
+
+    Mark a test with ``allow_duplicate_queries`` to skip the check.
+    """
+    if request.node.get_closest_marker("allow_duplicate_queries"):
+        return
+    settings.BLOG_DUPLICATE_QUERY_THRESHOLD = DUPLICATE_QUERY_THRESHOLD
+    settings.BLOG_DUPLICATE_QUERY_RAISE = True
+
+
+@pytest.fixture
+def no_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 0
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -133,6 +159,16 @@ def another_user_client(another_user):
     return client
 
 
+def get_page_urls(post):
+    """URLs of the feed and post pages showing ``post``."""
+    return [
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+        f"/posts/{post.id}/",
+    ]
+
+
 def get_post_list_context_key(
         user_client, page_url, page_load_err_msg, key_missing_msg
 ):
@@ -363,6 +399,7 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
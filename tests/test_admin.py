@@ -0,0 +1,145 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog import caching
+
+pytestmark = [pytest.mark.django_db]
+
+CHANGELISTS = ["/admin/blog/post/", "/admin/blog/comment/"]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize("url", CHANGELISTS)
+def test_changelist_queries_do_not_grow_with_rows(
+        url, admin_client, mixer: Mixer
+):
+    post = mixer.blend("blog.Post")
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    few = count_queries(admin_client, url)
+    posts = mixer.cycle(10).blend("blog.Post")
+    for post in posts:
+        mixer.blend("blog.Comment", post=post)
+    assert count_queries(admin_client, url) == few, (
+        f"Убедитесь, что число запросов к БД на странице `{url}` не зависит"
+        " от числа строк в списке."
+    )
+
+
+def test_changelist_skips_full_count(admin_client, mixer: Mixer):
+    mixer.blend("blog.Comment")
+    with CaptureQueriesContext(connection) as context:
+        admin_client.get("/admin/blog/comment/?q=text")
+    counts = [
+        query["sql"] for query in context.captured_queries
+        if "COUNT(" in query["sql"].upper()
+    ]
+    assert len(counts) == 1, (
+        "Убедитесь, что при фильтрации списка комментариев общее число"
+        " записей в таблице не подсчитывается."
+    )
+
+
+def test_comment_post_filter_is_autocomplete(admin_client, mixer: Mixer):
+    posts = mixer.cycle(3).blend("blog.Post", title=mixer.sequence("Пост {0}"))
+    mixer.blend("blog.Comment", post=posts[0], text="Первый")
+    mixer.blend("blog.Comment", post=posts[1], text="Второй")
+    response = admin_client.get("/admin/blog/comment/")
+    content = response.content.decode()
+    assert "admin-autocomplete" in content
+    assert posts[2].title not in content, (
+        "Убедитесь, что фильтр по публикации в списке комментариев не"
+        " выводит все публикации."
+    )
+    response = admin_client.get(
+        f"/admin/blog/comment/?post__id__exact={posts[0].pk}"
+    )
+    assert list(response.context["cl"].result_list) == list(
+        posts[0].comments.all()
+    )
+    assert f'value="{posts[0].pk}" selected' in response.content.decode()
+
+
+def test_comment_post_filter_rejects_bad_ids(admin_client):
+    response = admin_client.get("/admin/blog/comment/?post__id__exact=abc")
+    assert response.status_code == 302, (
+        "Убедитесь, что некорректный идентификатор публикации в фильтре"
+        " не приводит к ошибке сервера."
+    )
+    assert response["Location"].endswith("?e=1")
+
+
+def run_action(client, url, action, objects, **data):
+    return client.post(url, {
+        "action": action,
+        "_selected_action": [obj.pk for obj in objects],
+        **data,
+    }, follow=True)
+
+
+def test_bulk_unpublish_posts(
+        admin_client,
+        mixer: Mixer,
+        many_posts_with_published_locations,
+        django_assert_max_num_queries,
+):
+    posts = many_posts_with_published_locations
+    post = posts[0]
+    page_urls = ["/", f"/posts/{post.pk}/"]
+    client = type(admin_client)()
+    for url in page_urls:
+        client.get(url)
+    with django_assert_max_num_queries(7):
+        response = admin_client.post("/admin/blog/post/", {
+            "action": "unpublish_posts",
+            "_selected_action": [obj.pk for obj in posts],
+        })
+    assert response.status_code == 302
+    messages = [
+        str(message) for message in
+        admin_client.get("/admin/blog/post/").context["messages"]
+    ]
+    assert f"Снято с публикации публикаций: {len(posts)}." in messages, (
+        "Убедитесь, что действие сообщает число изменённых публикаций."
+    )
+    assert not type(post).objects.filter(is_published=True).exists()
+    assert client.get("/")["X-Cache"] == "MISS"
+    assert client.get(f"/posts/{post.pk}/").status_code == 404, (
+        "Убедитесь, что массовое снятие с публикации сбрасывает кэш"
+        " страниц."
+    )
+
+
+def test_bulk_move_to_category(admin_client, mixer: Mixer):
+    posts = mixer.cycle(3).blend("blog.Post")
+    category = mixer.blend("blog.Category", is_published=True)
+    response = run_action(
+        admin_client, "/admin/blog/post/", "move_to_category", posts
+    )
+    assert "form" in response.context, (
+        "Убедитесь, что перед переносом публикаций запрашивается категория."
+    )
+    run_action(
+        admin_client, "/admin/blog/post/", "move_to_category", posts,
+        value=category.pk, apply="1",
+    )
+    assert set(category.posts.all()) == set(posts)
+
+
+def test_bulk_unpublish_categories(admin_client, mixer: Mixer):
+    categories = mixer.cycle(3).blend("blog.Category", is_published=True)
+    version = caching.get_versions("site")
+    run_action(
+        admin_client, "/admin/blog/category/", "unpublish", categories
+    )
+    assert not type(categories[0]).objects.filter(is_published=True).exists()
+    assert caching.get_versions("site") != version, (
+        "Убедитесь, что массовые действия сбрасывают кэш страниц."
+    )
@@ -0,0 +1,113 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при добавлении комментария увеличивается счётчик"
+        " комментариев публикации."
+    )
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария уменьшается счётчик"
+        " комментариев публикации."
+    )
+
+
+def test_recount_comments_command(mixer: Mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.update(comment_count=0)
+    call_command("recount_comments", "--batch-size=1", stdout=None)
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+def test_saving_a_post_keeps_comment_count(
+        mixer: Mixer, post_with_published_location
+):
+    post = Post.objects.get(pk=post_with_published_location.pk)
+    mixer.blend("blog.Comment", post=post)
+    post.title = "Новый заголовок"
+    post.save()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что сохранение публикации не перезаписывает счётчик"
+        " комментариев, изменённый после её чтения."
+    )
+
+
+def test_deleting_a_post_does_not_update_it_per_comment(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(20).blend("blog.Comment", post=post)
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+    updates = [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith('UPDATE "blog_post"')
+    ]
+    assert not updates, (
+        "Убедитесь, что при удалении публикации счётчик комментариев не"
+        " обновляется для каждого удаляемого комментария."
+    )
+
+
+# The deletion summary of the admin reads the author of every comment.
+@pytest.mark.allow_duplicate_queries
+def test_admin_bulk_delete_does_not_update_posts_per_comment(
+        mixer: Mixer, post_with_published_location, admin_client
+):
+    post = post_with_published_location
+    mixer.cycle(20).blend("blog.Comment", post=post)
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.post("/admin/blog/post/", {
+            "action": "delete_selected",
+            "_selected_action": [post.pk],
+            "post": "yes",
+        })
+    assert response.status_code == 302
+    assert not Post.objects.filter(pk=post.pk).exists()
+    updates = [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith('UPDATE "blog_post"')
+    ]
+    assert not updates, (
+        "Убедитесь, что при удалении публикаций из админки счётчик"
+        " комментариев не обновляется для каждого комментария."
+    )
+
+
+def test_deleting_a_user_recounts_commented_posts(
+        mixer: Mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post)
+    mixer.blend("blog.Post", author=another_user)
+    with CaptureQueriesContext(connection) as queries:
+        another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что после удаления пользователя пересчитываются"
+        " счётчики комментариев публикаций, которые он комментировал."
+    )
+    updates = [
+        query["sql"] for query in queries.captured_queries
+        if query["sql"].startswith('UPDATE "blog_post"')
+    ]
+    assert len(updates) == 1
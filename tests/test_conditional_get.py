@@ -0,0 +1,84 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from conftest import get_page_urls
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_unchanged_pages_return_not_modified(
+        post_with_published_location,
+        user_client: Client,
+        django_assert_max_num_queries,
+):
+    for url in get_page_urls(post_with_published_location):
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header("ETag")
+        assert response.has_header("Last-Modified")
+        with django_assert_max_num_queries(3):
+            response = user_client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что неизменившаяся страница `{url}` отдаётся с"
+            " кодом 304."
+        )
+
+
+def test_comment_changes_etag(
+        mixer: Mixer, post_with_published_location, user_client: Client
+):
+    urls = get_page_urls(post_with_published_location)
+    etags = {url: user_client.get(url)["ETag"] for url in urls}
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    for url, etag in etags.items():
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что после добавления комментария страница `{url}`"
+            " отдаётся заново."
+        )
+
+
+def test_etag_depends_on_user(
+        post_with_published_location,
+        user_client: Client,
+        another_user_client: Client,
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = user_client.get(url)["ETag"]
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_etag_changes_after_login(
+        post_with_published_location, user, user_client: Client
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = user_client.get(url)["ETag"]
+    user_client.logout()
+    user_client.force_login(user)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после повторного входа страница с формой отдаётся"
+        " заново с новым CSRF-токеном."
+    )
+
+
+def test_scheduled_post_changes_last_modified(
+        mixer: Mixer, user, published_category, unlogged_client: Client
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    first = unlogged_client.get("/")["ETag"]
+    type(post).objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert unlogged_client.get("/")["ETag"] != first
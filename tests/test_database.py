@@ -0,0 +1,42 @@
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+pytestmark = [pytest.mark.django_db]
+
+
+def pragmas(path, *names):
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, "NAME": str(path)}, alias="pragmas"
+    )
+    try:
+        with wrapper.cursor() as cursor:
+            return [
+                cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in names
+            ]
+    finally:
+        wrapper.close()
+
+
+def test_sqlite_connections_are_tuned(tmp_path):
+    journal_mode, synchronous, busy_timeout = pragmas(
+        tmp_path / "db.sqlite3", "journal_mode", "synchronous", "busy_timeout"
+    )
+    assert journal_mode == "wal", (
+        "Убедитесь, что новые соединения с SQLite включают режим WAL."
+    )
+    assert synchronous == 1, (
+        "Убедитесь, что для SQLite задан `synchronous = NORMAL`."
+    )
+    assert busy_timeout == 5000
+
+
+def test_sqlite_pragmas_setting(settings, tmp_path):
+    settings.BLOG_SQLITE_PRAGMAS = {}
+    assert pragmas(tmp_path / "db.sqlite3", "journal_mode") == ["delete"], (
+        "Убедитесь, что при пустом `BLOG_SQLITE_PRAGMAS` настройки SQLite "
+        "не меняются."
+    )
+    settings.BLOG_SQLITE_PRAGMAS = {"busy_timeout": 100}
+    assert pragmas(tmp_path / "other.sqlite3", "busy_timeout") == [100]
@@ -0,0 +1,101 @@
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_feed_urls(post):
+    urls = []
+    for kind in ("rss", "atom"):
+        urls += [
+            f"/feed/{kind}/",
+            f"/category/{post.category.slug}/{kind}/",
+            f"/profile/{post.author.username}/{kind}/",
+        ]
+    return urls
+
+
+def test_feeds_list_published_posts(
+        mixer: Mixer, post_with_published_location, unlogged_client: Client
+):
+    hidden = mixer.blend(
+        "blog.Post",
+        category=post_with_published_location.category,
+        author=post_with_published_location.author,
+        is_published=False,
+    )
+    for url in get_feed_urls(post_with_published_location):
+        response = unlogged_client.get(url)
+        assert response.status_code == 200, (
+            f"Убедитесь, что лента `{url}` доступна."
+        )
+        content = response.content.decode()
+        assert post_with_published_location.title in content, (
+            f"Убедитесь, что лента `{url}` содержит опубликованные посты."
+        )
+        assert hidden.title not in content, (
+            f"Убедитесь, что лента `{url}` не содержит снятые с публикации"
+            " посты."
+        )
+
+
+def test_feed_is_cached_until_post_changes(
+        mixer: Mixer,
+        post_with_published_location,
+        unlogged_client: Client,
+        django_assert_max_num_queries,
+):
+    url = "/feed/rss/"
+    response = unlogged_client.get(url)
+    assert response["X-Cache"] == "MISS"
+    with django_assert_max_num_queries(1):
+        response = unlogged_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+    assert response.status_code == 304, (
+        "Убедитесь, что лента поддерживает условные GET-запросы."
+    )
+    assert unlogged_client.get(url)["X-Cache"] == "HIT", (
+        "Убедитесь, что лента отдаётся из кэша."
+    )
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    assert unlogged_client.get(url)["X-Cache"] == "HIT", (
+        "Убедитесь, что новый комментарий не сбрасывает кэш ленты."
+    )
+    post_with_published_location.title = "Новый заголовок"
+    post_with_published_location.save()
+    response = unlogged_client.get(url)
+    assert response["X-Cache"] == "MISS", (
+        "Убедитесь, что кэш ленты сбрасывается при изменении поста."
+    )
+    assert "Новый заголовок" in response.content.decode()
+
+
+def test_unknown_feed_object_is_404(unlogged_client: Client):
+    assert unlogged_client.get("/category/missing/atom/").status_code == 404
+    assert unlogged_client.get("/profile/missing/rss/").status_code == 404
+
+
+def test_feeds_do_not_keep_stale_author_names(
+        post_with_published_location, unlogged_client: Client
+):
+    urls = get_feed_urls(post_with_published_location)
+    for url in urls:
+        unlogged_client.get(url)
+    author = post_with_published_location.author
+    author.first_name = "Новоеимя"
+    author.last_name = "Новаяфамилия"
+    author.save()
+    for url in urls:
+        content = unlogged_client.get(url).content.decode()
+        assert author.username in content, (
+            f"Убедитесь, что лента `{url}` указывает имя пользователя"
+            " автора."
+        )
+        assert "Новоеимя" not in content and (
+            "Новаяфамилия" not in content
+        ), (
+            f"Убедитесь, что лента `{url}` не показывает полное имя автора,"
+            " которое не сбрасывает её кэш."
+        )
@@ -0,0 +1,42 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_generate_content():
+    call_command(
+        "generate_content", users=20, categories=30, locations=5,
+        posts=500, comments=2000, seed=1, batch_size=100,
+    )
+    assert Post.objects.count() == 500
+    assert Comment.objects.count() == 2000
+    now = timezone.now()
+    assert Post.objects.filter(pub_date__gt=now).exists(), (
+        "Убедитесь, что генератор создаёт отложенные публикации."
+    )
+    assert Post.objects.filter(is_published=False).exists()
+    assert Category.objects.filter(is_published=False).exists()
+    assert not Comment.objects.filter(created_at__gt=now).exists()
+    assert not Comment.objects.filter(
+        post__pub_date__gt=now
+    ).exists(), (
+        "Убедитесь, что комментарии не создаются к ещё не вышедшим"
+        " публикациям."
+    )
+    counts = list(
+        Post.objects.annotate(total=Count("comments"))
+        .values_list("comment_count", "total")
+    )
+    assert all(stored == total for stored, total in counts), (
+        "Убедитесь, что после генерации количество комментариев у"
+        " публикаций пересчитано."
+    )
+    hottest = max(stored for stored, _ in counts)
+    assert hottest > 10 * 2000 / 500, (
+        "Убедитесь, что комментарии распределены неравномерно."
+    )
@@ -0,0 +1,57 @@
+import pytest
+from django.test.client import Client
+
+from blog import images
+from blog.constants import IMAGE_VARIANTS
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_image_variants_are_rendered(
+        post_with_published_location, user_client: Client
+):
+    post = post_with_published_location
+    images.process_post_image(post.id)
+    post.refresh_from_db()
+    assert set(post.image_variants) == set(IMAGE_VARIANTS), (
+        "Убедитесь, что для изображения публикации создаются все"
+        " уменьшенные копии."
+    )
+    storage = post.image.storage
+    try:
+        for variant in post.image_variants.values():
+            assert storage.exists(variant["jpg"])
+            assert storage.exists(variant["webp"])
+        for url in ("/", f"/posts/{post.id}/"):
+            content = user_client.get(url).content.decode("utf-8")
+            assert 'type="image/webp"' in content
+            assert storage.url(post.image_variants["feed"]["jpg"]) in content
+    finally:
+        images.delete_variants(post.image_variants)
+
+
+def test_new_image_resets_variants(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        image_variants={"feed": {"width": 1, "jpg": "", "webp": ""}}
+    )
+    post.image = None
+    post.save()
+    post.refresh_from_db()
+    assert post.image_variants == {}
+
+
+def test_saving_a_stale_post_keeps_variants(post_with_published_location):
+    stale = Post.objects.get(pk=post_with_published_location.pk)
+    images.process_post_image(stale.id)
+    try:
+        stale.title = "Новый заголовок"
+        stale.save()
+        stale.refresh_from_db()
+        assert set(stale.image_variants) == set(IMAGE_VARIANTS), (
+            "Убедитесь, что сохранение публикации, прочитанной до создания"
+            " копий изображения, не стирает их."
+        )
+    finally:
+        images.delete_variants(stale.image_variants)
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.test.client import Client
+
+from blog import metrics
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_metrics(client, **headers):
+    response = client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    return response.content.decode()
+
+
+def test_metrics_require_staff_or_token(
+        settings, user_client: Client, admin_client: Client,
+        unlogged_client: Client
+):
+    assert unlogged_client.get("/metrics").status_code == 403
+    assert user_client.get("/metrics").status_code == 403, (
+        "Убедитесь, что метрики недоступны обычным пользователям."
+    )
+    get_metrics(admin_client)
+    settings.BLOG_METRICS_TOKEN = "secret"
+    assert admin_client.get("/metrics").status_code == 403
+    get_metrics(unlogged_client, Authorization="Bearer secret")
+
+
+def test_request_and_write_metrics(
+        mixer, post_with_published_location, unlogged_client: Client,
+        admin_client: Client
+):
+    unlogged_client.get(f"/posts/{post_with_published_location.pk}/")
+    unlogged_client.get(f"/posts/{post_with_published_location.pk}/")
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    content = get_metrics(admin_client)
+    for line in (
+        'blog_request_duration_seconds_bucket{view="blog:post_detail",'
+        'le="+Inf"}',
+        'blog_responses_total{view="blog:post_detail",status="200"}',
+        'blog_db_queries_total{view="blog:post_detail"}',
+        'blog_page_cache_total{result="hits"}',
+        'blog_writes_total{model="comment",action="created"}',
+        'blog_task_queue_depth{name="blog.images.process_post_image",'
+        'status="pending"} 1',
+    ):
+        assert line in content, (
+            f"Убедитесь, что в метриках есть `{line}`."
+        )
+
+
+def test_metrics_are_summed_over_processes(
+        settings, tmp_path, admin_client: Client
+):
+    settings.BLOG_METRICS_DIR = str(tmp_path)
+    metrics.flush()
+    own_file = tmp_path / metrics._file_name(os.getpid(), metrics._started)
+    own = json.loads(own_file.read_text())
+    misses = sum(
+        value for key, value in own.get("blog_page_cache", [])
+        if key == ["misses"]
+    )
+    exited = subprocess.Popen([sys.executable, "-c", ""])
+    exited.wait()
+    other = {
+        "blog_page_cache": [[["misses"], 1000]],
+        "blog_request_duration_seconds": [[
+            ["blog:index"], [[1] + [0] * len(metrics.METRICS_BUCKETS), 0.5]
+        ]],
+    }
+    files = [
+        # A worker that has exited.
+        metrics._file_name(exited.pid, 1),
+        # An earlier process whose pid is now used by this one.
+        metrics._file_name(os.getpid(), metrics._started - 1),
+    ]
+    for name in files:
+        (tmp_path / name).write_text(json.dumps(other))
+
+    for _ in range(2):
+        content = get_metrics(admin_client)
+        assert (
+            f'blog_page_cache_total{{result="misses"}} {misses + 2000}'
+            in content
+        ), (
+            "Убедитесь, что метрики всех процессов, включая завершившиеся,"
+            " суммируются."
+        )
+        assert 'blog_request_duration_seconds_bucket{view="blog:index",' in (
+            content
+        )
+    assert not any((tmp_path / name).exists() for name in files), (
+        "Убедитесь, что файлы завершившихся процессов объединяются в архив"
+        " и удаляются."
+    )
+    assert own_file.exists()
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog import caching
+from conftest import get_page_urls
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_pages_are_cached(
+        post_with_published_location,
+        unlogged_client: Client,
+        django_assert_max_num_queries,
+):
+    for url in get_page_urls(post_with_published_location):
+        assert unlogged_client.get(url)["X-Cache"] == "MISS"
+        with django_assert_max_num_queries(1):
+            response = unlogged_client.get(url)
+        assert response["X-Cache"] == "HIT", (
+            f"Убедитесь, что страница `{url}` для анонимного пользователя"
+            " отдаётся из кэша."
+        )
+    assert caching.get_stats() == {"hits": 4, "misses": 4}
+
+
+def test_logged_in_pages_are_not_cached(
+        post_with_published_location, user_client: Client
+):
+    for url in get_page_urls(post_with_published_location):
+        user_client.get(url)
+        assert "X-Cache" not in user_client.get(url)
+
+
+def test_comment_invalidates_pages(
+        mixer: Mixer, post_with_published_location, unlogged_client: Client
+):
+    urls = get_page_urls(post_with_published_location)
+    for url in urls:
+        unlogged_client.get(url)
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    for url in urls:
+        response = unlogged_client.get(url)
+        assert response["X-Cache"] == "MISS", (
+            f"Убедитесь, что кэш страницы `{url}` сбрасывается при"
+            " добавлении комментария к публикации."
+        )
+
+
+def test_unpublished_category_invalidates_pages(
+        post_with_published_location, unlogged_client: Client
+):
+    unlogged_client.get("/")
+    category = post_with_published_location.category
+    category.is_published = False
+    category.save()
+    content = unlogged_client.get("/").content.decode("utf-8")
+    assert post_with_published_location.title not in content
+
+
+def test_scheduled_post_bounds_cache_timeout(
+        mixer: Mixer, user, published_category
+):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert caching._page_timeout() <= 30
+
+
+@pytest.mark.parametrize("change", ["post", "category", "location", "author"])
+def test_post_card_fragment_follows_changes(
+        change: str, post_with_published_location, user_client: Client
+):
+    post = post_with_published_location
+    user_client.get("/")
+    obj, field = {
+        "post": (post, "title"),
+        "category": (post.category, "title"),
+        "location": (post.location, "name"),
+        "author": (post.author, "username"),
+    }[change]
+    setattr(obj, field, "Обновлённое имя")
+    obj.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Обновлённое имя" in content, (
+        "Убедитесь, что карточка публикации в ленте обновляется после"
+        " изменения публикации, её категории, местоположения или автора."
+    )
+
+
+def test_user_changes_invalidate_only_their_pages(mixer: Mixer, user):
+    site = caching.get_versions("site")
+    mixer.blend("auth.User")
+    user.last_login = timezone.now()
+    user.save(update_fields=["last_login"])
+    assert caching.get_versions("site") == site, (
+        "Убедитесь, что регистрация и вход пользователя не сбрасывают кэш"
+        " всего сайта."
+    )
+    profile = caching.get_versions(f"author:{user.username}")
+    user.last_name = "Новая фамилия"
+    user.save()
+    assert caching.get_versions("site") == site
+    assert caching.get_versions(f"author:{user.username}") != profile, (
+        "Убедитесь, что изменение имени сбрасывает кэш страницы профиля."
+    )
+    user.username = "renamed"
+    user.save()
+    assert caching.get_versions("site") != site, (
+        "Убедитесь, что смена логина сбрасывает кэш всего сайта."
+    )
+
+
+def test_deleting_a_post_does_not_query_per_comment(
+        mixer: Mixer, post_with_published_location,
+        django_assert_max_num_queries
+):
+    post = post_with_published_location
+    mixer.cycle(20).blend("blog.Comment", post=post)
+    with django_assert_max_num_queries(10):
+        post.delete()
+
+
+def test_bulk_post_delete_does_not_query_per_post(
+        mixer: Mixer, user, published_category, unlogged_client: Client,
+        django_assert_max_num_queries
+):
+    from blog.models import Post
+
+    posts = mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    for post in posts:
+        mixer.cycle(5).blend("blog.Comment", post=post)
+    unlogged_client.get("/")
+    with django_assert_max_num_queries(12):
+        Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+    assert unlogged_client.get("/")["X-Cache"] == "MISS", (
+        "Убедитесь, что удаление публикаций запросом сбрасывает кэш ленты."
+    )
@@ -0,0 +1,170 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db, pytest.mark.usefixtures("no_page_cache")
+]
+
+
+@pytest.fixture
+def keyset_pagination(settings):
+    settings.BLOG_KEYSET_PAGINATION = True
+
+
+@pytest.fixture
+def posts_with_shared_dates(mixer: Mixer, user, published_category):
+    start = timezone.now() - timedelta(days=1)
+    pub_dates = (start - timedelta(hours=i // 3) for i in range(25))
+    return mixer.cycle(25).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        pub_date=pub_dates,
+    )
+
+
+def get_cursor(content: str, label: str):
+    match = re.search(
+        r'href="\?cursor=([^"]+)">\s*' + re.escape(label), content
+    )
+    return match.group(1) if match else None
+
+
+def walk(client: Client, label: str, cursor=None):
+    pages = []
+    while True:
+        url = f"/?cursor={cursor}" if cursor else "/"
+        response = client.get(url)
+        pages.append([post.id for post in response.context["page_obj"]])
+        cursor = get_cursor(response.content.decode("utf-8"), label)
+        if not cursor:
+            return pages, url
+
+
+def test_keyset_pagination_walks_feed(
+        keyset_pagination, posts_with_shared_dates, unlogged_client: Client
+):
+    expected = list(
+        Post.objects.order_by("-pub_date", "-id").values_list("id", flat=True)
+    )
+    pages, last_url = walk(unlogged_client, ">>")
+    assert [len(page) for page in pages] == [N_PER_PAGE, N_PER_PAGE, 5], (
+        "Убедитесь, что при курсорной пагинации на странице выводится"
+        f" не больше {N_PER_PAGE} публикаций."
+    )
+    assert sum(pages, []) == expected, (
+        "Убедитесь, что при курсорной пагинации публикации не теряются и"
+        " не повторяются при переходе на следующую страницу."
+    )
+
+    cursor = last_url.split("=", 1)[1]
+    back_pages, _ = walk(unlogged_client, "<<", cursor)
+    assert back_pages[1:] == pages[-2::-1], (
+        "Убедитесь, что ссылка на предыдущую страницу при курсорной"
+        " пагинации ведёт к тем же публикациям в обратном порядке."
+    )
+
+
+def test_keyset_pagination_ignores_bad_cursor(
+        keyset_pagination, posts_with_shared_dates, unlogged_client: Client
+):
+    response = unlogged_client.get("/?cursor=garbage")
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def test_feed_count_is_cached_and_invalidated(
+        many_posts_with_published_locations,
+        mixer: Mixer,
+        unlogged_client: Client,
+        django_assert_num_queries,
+):
+    post = many_posts_with_published_locations[0]
+    unlogged_client.get("/")
+    with django_assert_num_queries(2):
+        response = unlogged_client.get("/")
+    assert response.context["page_obj"].paginator.count == 20
+
+    mixer.blend(
+        "blog.Post", author=post.author, category=post.category,
+        pub_date=post.pub_date,
+    )
+    response = unlogged_client.get("/")
+    assert response.context["page_obj"].paginator.count == 21, (
+        "Убедитесь, что кэшированное число публикаций в ленте сбрасывается"
+        " после добавления публикации."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    with django_assert_num_queries(2):
+        unlogged_client.get("/")
+
+
+def test_comments_are_paginated(
+        mixer: Mixer, post_with_published_location, user_client: Client
+):
+    from blog.constants import COMMENTS_PER_PAGE
+    from blog.models import Comment
+
+    post = post_with_published_location
+    mixer.cycle(COMMENTS_PER_PAGE * 2 + 5).blend("blog.Comment", post=post)
+    expected = list(
+        Comment.objects.filter(post=post)
+        .order_by("created_at", "id").values_list("id", flat=True)
+    )
+
+    response = user_client.get(f"/posts/{post.id}/")
+    comments = response.context["comments"]
+    assert len(comments) == COMMENTS_PER_PAGE, (
+        "Убедитесь, что на странице публикации выводится не больше"
+        f" {COMMENTS_PER_PAGE} комментариев."
+    )
+    assert "js-more-comments" in response.content.decode("utf-8")
+
+    seen = [comment.id for comment in comments]
+    cursor = comments.next_cursor
+    while cursor:
+        data = user_client.get(
+            f"/posts/{post.id}/comments/",
+            {"cursor": cursor, "format": "json"},
+        ).json()
+        seen += [comment["id"] for comment in data["comments"]]
+        cursor = data["next"]
+    assert seen == expected, (
+        "Убедитесь, что подгрузка комментариев возвращает все комментарии"
+        " по порядку без повторов."
+    )
+
+    fragment = user_client.get(
+        f"/posts/{post.id}/comments/", {"cursor": comments.next_cursor}
+    ).content.decode("utf-8")
+    assert "<html" not in fragment
+    assert fragment.count('class="media mb-4"') == COMMENTS_PER_PAGE
+
+
+def test_comments_format_comes_from_url(
+        mixer: Mixer, post_with_published_location, unlogged_client: Client
+):
+    from blog.constants import COMMENTS_PER_PAGE
+
+    post = post_with_published_location
+    mixer.cycle(COMMENTS_PER_PAGE + 1).blend("blog.Comment", post=post)
+    url = f"/posts/{post.id}/comments/"
+    json_response = unlogged_client.get(
+        url, HTTP_ACCEPT="application/json"
+    )
+    html_response = unlogged_client.get(url, HTTP_ACCEPT="text/html")
+    assert json_response["Content-Type"].startswith("text/html")
+    assert html_response["Content-Type"].startswith("text/html"), (
+        "Убедитесь, что формат подгрузки комментариев выбирается только"
+        " параметром `format` и JSON не попадает в кэш HTML-фрагмента."
+    )
+    assert unlogged_client.get(url, {"format": "json"}).json()["comments"]
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+from django.test.client import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db, pytest.mark.usefixtures("no_page_cache")
+]
+
+FEED_PAGE_QUERIES = {
+    "index": 2,
+    "category": 3,
+    "profile": 3,
+}
+
+
+@pytest.fixture
+def commented_posts(mixer: Mixer, many_posts_with_published_locations):
+    for post in many_posts_with_published_locations:
+        mixer.cycle(2).blend("blog.Comment", post=post)
+    return many_posts_with_published_locations
+
+
+def get_feed_urls(post):
+    return {
+        "index": "/",
+        "category": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{post.author.username}/",
+    }
+
+
+@pytest.mark.parametrize("page", ["index", "category", "profile"])
+def test_feed_query_count(
+        page: str,
+        commented_posts,
+        unlogged_client: Client,
+        django_assert_num_queries,
+):
+    url = get_feed_urls(commented_posts[0])[page]
+    expected = FEED_PAGE_QUERIES[page]
+    unlogged_client.get(url)
+    for page_number in (1, 2):
+        with django_assert_num_queries(expected):
+            response = unlogged_client.get(f"{url}?page={page_number}")
+        assert len(response.context["page_obj"]) == N_PER_PAGE, (
+            f"Убедитесь, что на странице `{url}` отображается"
+            f" {N_PER_PAGE} публикаций."
+        )
+        assert "Комментарии (2)" in response.content.decode("utf-8"), (
+            "Убедитесь, что под постами в ленте отображается количество"
+            " комментариев."
+        )
+
+
+@pytest.mark.parametrize(
+    ("post_state", "client_name", "expected_status", "expected_queries"),
+    [
+        ({}, "unlogged_client", 200, 2),
+        ({}, "user_client", 200, 4),
+        ({}, "another_user_client", 200, 4),
+        ({"is_published": False}, "user_client", 200, 4),
+        ({"is_published": False}, "another_user_client", 404, 3),
+        ({"category__is_published": False}, "user_client", 200, 4),
+        ({"category__is_published": False}, "unlogged_client", 404, 1),
+        ({"pub_date": "future"}, "user_client", 200, 4),
+        ({"pub_date": "future"}, "unlogged_client", 404, 1),
+    ],
+)
+def test_post_detail_query_count(
+        request,
+        mixer: Mixer,
+        user,
+        post_state: dict,
+        client_name: str,
+        expected_status: int,
+        expected_queries: int,
+        django_assert_num_queries,
+):
+    post_state = {"category__is_published": True, **post_state}
+    if post_state.get("pub_date") == "future":
+        post_state["pub_date"] = timezone.now() + timedelta(days=1)
+    post = mixer.blend(
+        "blog.Post", author=user, **post_state
+    )
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    client = request.getfixturevalue(client_name)
+    with django_assert_num_queries(expected_queries):
+        response = client.get(f"/posts/{post.id}/")
+    assert response.status_code == expected_status, (
+        "Убедитесь, что страница публикации доступна автору в любом"
+        " состоянии публикации, а остальным — только опубликованная."
+    )
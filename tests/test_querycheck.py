@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+from django.test.client import Client
+
+from blog.models import PostQuerySet
+from blog.querycheck import DuplicateQueriesError, normalize
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_normalize():
+    assert normalize(
+        "SELECT * FROM blog_post WHERE id = 12 AND title = 'it''s'"
+    ) == normalize(
+        "SELECT  *\nFROM blog_post WHERE id = 7 AND title = 'other'"
+    )
+    assert normalize(
+        "SELECT * FROM blog_post WHERE id IN (%s, %s, %s)"
+    ) == normalize("SELECT * FROM blog_post WHERE id IN (%s)")
+
+
+@pytest.fixture
+def n_plus_one(monkeypatch, many_posts_with_published_locations):
+    monkeypatch.setattr(
+        PostQuerySet, "with_relations",
+        lambda self: self.order_by("-pub_date"),
+    )
+
+
+@pytest.mark.usefixtures("n_plus_one")
+def test_n_plus_one_fails_request(unlogged_client: Client):
+    with pytest.raises(DuplicateQueriesError) as error:
+        unlogged_client.get("/")
+    message = str(error.value)
+    assert "blog:index" in message
+    assert "includes/post_card.html" in message, (
+        "Убедитесь, что в отчёте о повторяющихся запросах указан шаблон,"
+        " который их выполнил."
+    )
+
+
+@pytest.mark.allow_duplicate_queries
+@pytest.mark.usefixtures("n_plus_one")
+def test_n_plus_one_is_logged(settings, unlogged_client: Client, caplog):
+    settings.BLOG_DUPLICATE_QUERY_THRESHOLD = 3
+    with caplog.at_level(logging.WARNING, logger="blog.querycheck"):
+        assert unlogged_client.get("/").status_code == 200
+    assert any(
+        "blog:index" in record.getMessage() for record in caplog.records
+    )
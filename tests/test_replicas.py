@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test.client import Client
+from django.utils import timezone
+
+from blog import caching, routers
+
+
+def copy_primary(path):
+    target = sqlite3.connect(path)
+    try:
+        connection.ensure_connection()
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path):
+    """A second SQLite file with a copy of the primary database."""
+    path = tmp_path / "replica.sqlite3"
+    connections.settings["replica"] = {
+        **connection.settings_dict, "NAME": str(path)
+    }
+    # Connect outside of the test database checks, which only know the
+    # aliases configured before the test.
+    connections["replica"].connect()
+    settings.BLOG_READ_REPLICAS = ["replica"]
+    settings.BLOG_REPLICA_STICKY_SECONDS = 60
+    yield lambda: copy_primary(path)
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+
+
+def age_pages(*namespaces):
+    """Make the pages look unchanged for longer than the sticky window."""
+    cache.set_many(
+        {caching._version_key(namespace): 1
+         for namespace in ("site", *namespaces)},
+        timeout=None,
+    )
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(title):
+        return mixer.blend(
+            "blog.Post", title=title, is_published=True, author=user,
+            category=published_category, location=None,
+            pub_date=timezone.now() - timedelta(days=1),
+        )
+    return make
+
+
+def test_feed_and_detail_read_from_replica(
+        replica, make_post, client: Client
+):
+    synced = make_post("Публикация на реплике")
+    replica()
+    fresh = make_post("Публикация только на основной базе")
+    age_pages("index", f"post:{synced.pk}", f"post:{fresh.pk}")
+
+    content = client.get("/").content.decode()
+    assert synced.title in content
+    assert fresh.title not in content, (
+        "Убедитесь, что главная страница читает публикации с реплики."
+    )
+    assert client.get(f"/posts/{fresh.pk}/").status_code == 404
+    assert client.get(f"/posts/{synced.pk}/").status_code == 200
+
+
+def test_recently_changed_pages_read_primary(
+        replica, make_post, client: Client
+):
+    replica()
+    fresh = make_post("Новая публикация")
+    assert fresh.title in client.get("/").content.decode(), (
+        "Убедитесь, что страницы, изменившиеся недавно, читают основную "
+        "базу, чтобы в кэш не попала устаревшая реплика."
+    )
+
+
+def test_writes_pin_reads_to_primary(
+        replica, make_post, user_client: Client, client: Client
+):
+    post = make_post("Публикация")
+    replica()
+    response = user_client.post(
+        f"/posts/{post.pk}/comment/", {"text": "Свежий комментарий"}
+    )
+    cookie = response.cookies.get(routers.PRIMARY_COOKIE)
+    assert cookie is not None and cookie["max-age"] == 60, (
+        "Убедитесь, что после записи чтение закрепляется за основной "
+        "базой на `BLOG_REPLICA_STICKY_SECONDS` секунд."
+    )
+    age_pages("index", f"post:{post.pk}", f"author:{post.author.username}")
+
+    assert "Свежий комментарий" in (
+        user_client.get(f"/posts/{post.pk}/").content.decode()
+    ), "Убедитесь, что автор сразу видит свой комментарий."
+    assert "Свежий комментарий" not in (
+        client.get(f"/posts/{post.pk}/").content.decode()
+    )
+
+
+@pytest.mark.django_db
+def test_no_replicas_no_cookie(user_client: Client, mixer, user):
+    post = mixer.blend("blog.Post", is_published=True, author=user)
+    response = user_client.post(
+        f"/posts/{post.pk}/comment/", {"text": "Комментарий"}
+    )
+    assert routers.PRIMARY_COOKIE not in response.cookies
@@ -0,0 +1,178 @@
+import pytest
+from django.test.client import Client
+from mixer.backend.django import Mixer
+
+from blog import search
+from conftest import N_PER_PAGE
+
+pytestmark = [
+    pytest.mark.django_db, pytest.mark.usefixtures("no_page_cache")
+]
+
+
+@pytest.fixture
+def searchable_posts(mixer: Mixer, user, published_category):
+    def blend(title, text, **kwargs):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            title=title, text=text, **kwargs
+        )
+
+    return {
+        "title": blend("Прогулка по Байкалу", "Озеро и горы вокруг."),
+        "text": blend("Путевые заметки", "Летом мы были на Байкале."),
+        "hidden": blend(
+            "Байкал зимой", "Лёд и ветер.", is_published=False
+        ),
+        "other": blend("Рецепт пирога", "Мука, яйца, сахар."),
+    }
+
+
+def get_found(client: Client, query: str):
+    response = client.get("/search/", {"q": query})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_and_respects_visibility(
+        searchable_posts, unlogged_client: Client
+):
+    assert isinstance(search.get_backend(), search.FTS5Backend)
+    found = get_found(unlogged_client, "байкал")
+    assert found == [
+        searchable_posts["title"].id, searchable_posts["text"].id
+    ], (
+        "Убедитесь, что поиск находит опубликованные посты по началу слова"
+        " без учёта регистра, а совпадения в заголовке идут первыми."
+    )
+
+
+def test_search_index_follows_edits(
+        searchable_posts, unlogged_client: Client
+):
+    post = searchable_posts["other"]
+    post.title = "Пирог с Байкальским омулем"
+    post.save()
+    assert post.id in get_found(unlogged_client, "Байкал")
+    post.delete()
+    assert post.id not in get_found(unlogged_client, "Байкал")
+
+
+@pytest.fixture
+def inverted_index(settings):
+    settings.BLOG_SEARCH_BACKEND = "blog.search.InvertedIndexBackend"
+
+
+def test_inverted_index_backend(
+        inverted_index, searchable_posts, mixer: Mixer,
+        unlogged_client: Client
+):
+    found = get_found(unlogged_client, "Байкалу")
+    assert found == [
+        searchable_posts["title"].id, searchable_posts["text"].id
+    ], (
+        "Убедитесь, что резервный поисковый индекс учитывает словоформы,"
+        " видимость публикаций и ставит совпадения в заголовке выше."
+    )
+    backend = search.get_backend()
+    assert isinstance(backend, search.InvertedIndexBackend)
+    assert backend.stats()["documents"] == len(searchable_posts)
+    assert backend.stats()["build_seconds"] is not None
+
+    post = searchable_posts["other"]
+    post.text = "Пирог везли с собой на Байкале."
+    post.save()
+    assert post.id in get_found(unlogged_client, "байкалу")
+    post.delete()
+    assert post.id not in get_found(unlogged_client, "байкалу")
+    assert backend.stats()["documents"] == len(searchable_posts) - 1
+
+
+def test_inverted_index_memory_bound(searchable_posts):
+    backend = search.InvertedIndexBackend(max_postings=5)
+    backend.build()
+    stats = backend.stats()
+    assert stats["complete"] is False
+    assert stats["documents"] < len(searchable_posts)
+
+
+def test_inverted_index_memory_bound_on_updates(searchable_posts):
+    backend = search.InvertedIndexBackend(max_postings=100)
+    backend.build()
+    assert backend.stats()["complete"] is True
+    backend.max_postings = backend.stats()["postings"]
+    post = searchable_posts["other"]
+    post.text = "Пирог с брусникой, который мы пекли в походе у костра."
+    backend.index_post(post)
+    stats = backend.stats()
+    assert stats["postings"] <= backend.max_postings, (
+        "Убедитесь, что обновления индекса не превышают лимит записей."
+    )
+    assert stats["complete"] is False
+    assert searchable_posts["title"].id not in backend.doc_terms
+    assert post.id in backend.doc_terms
+
+
+def test_inverted_index_skips_and_compacts_removed_postings(
+        searchable_posts
+):
+    backend = search.InvertedIndexBackend(max_postings=100)
+    backend.build()
+    post = searchable_posts["title"]
+    post.title = "Прогулка по Ангаре"
+    backend.index_post(post)
+    assert post.id not in backend.rank("байкалу"), (
+        "Убедитесь, что после обновления поста поиск не находит его по"
+        " прежнему тексту."
+    )
+    assert post.id in backend.rank("ангаре")
+    assert backend.stats()["dead_postings"] > 0
+    backend.max_postings = 2 * backend.stats()["dead_postings"] - 1
+    backend.remove_post(searchable_posts["other"].id)
+    assert backend.stats()["dead_postings"] == 0, (
+        "Убедитесь, что удалённые записи индекса со временем вычищаются."
+    )
+    assert post.id in backend.rank("прогулка")
+    assert searchable_posts["other"].id not in backend.rank("пирога")
+    assert searchable_posts["text"].id in backend.rank("байкале")
+
+
+def test_hidden_matches_do_not_crowd_out_visible_ones(
+        monkeypatch, mixer: Mixer, user, published_category,
+        unlogged_client: Client, settings
+):
+    settings.BLOG_SEARCH_BACKEND = "blog.search.InvertedIndexBackend"
+    monkeypatch.setattr(search, "SEARCH_MAX_RESULTS", 2)
+    visible = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Байкал летом",
+    )
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Байкал зимой", is_published=False,
+    )
+    assert get_found(unlogged_client, "байкал") == [visible.id], (
+        "Убедитесь, что скрытые публикации не вытесняют видимые из"
+        " результатов поиска."
+    )
+
+
+def test_search_pagination_keeps_query(
+        mixer: Mixer, user, published_category, unlogged_client: Client
+):
+    mixer.cycle(N_PER_PAGE + 1).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Озёрная история",
+    )
+    content = unlogged_client.get(
+        "/search/", {"q": "озёрная"}
+    ).content.decode("utf-8")
+    assert "?q=%D0%BE%D0%B7%D1%91%D1%80%D0%BD%D0%B0%D1%8F&amp;page=2" in (
+        content
+    ), "Убедитесь, что ссылки пагинации сохраняют поисковый запрос."
+
+
+def test_empty_query_shows_form(unlogged_client: Client):
+    response = unlogged_client.get("/search/")
+    assert response.status_code == 200
+    assert response.context["page_obj"] is None
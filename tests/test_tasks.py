@@ -0,0 +1,52 @@
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog import images, tasks
+from blog.models import Task
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@tasks.task
+def record(value):
+    calls.append(value)
+
+
+@tasks.task
+def explode():
+    raise RuntimeError("boom")
+
+
+def test_task_runs_in_worker():
+    calls.clear()
+    record.delay(42)
+    assert calls == [], "Убедитесь, что задача не выполняется сразу."
+    call_command("run_workers", "--once")
+    assert calls == [42]
+    assert not Task.objects.exists(), (
+        "Убедитесь, что выполненная задача удаляется из очереди."
+    )
+
+
+def test_failed_task_is_retried_then_marked_failed():
+    task_obj = explode.delay()
+    for _ in range(task_obj.max_attempts):
+        Task.objects.filter(pk=task_obj.pk).update(run_at=timezone.now())
+        assert tasks.run_next()
+    task_obj.refresh_from_db()
+    assert task_obj.status == Task.Status.FAILED
+    assert "boom" in task_obj.last_error
+    assert not tasks.run_next()
+
+
+def test_post_image_is_queued(post_with_published_location):
+    assert Task.objects.filter(
+        name=f"{images.__name__}.process_post_image",
+        args=[post_with_published_location.pk],
+    ).exists(), (
+        "Убедитесь, что обработка изображения публикации ставится в"
+        " очередь фоновых задач."
+    )
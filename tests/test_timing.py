@@ -0,0 +1,72 @@
+import json
+import logging
+
+import pytest
+from django.test.client import Client
+
+from blog import middleware
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_server_timing_header(
+        post_with_published_location, unlogged_client: Client, caplog
+):
+    with caplog.at_level(logging.INFO, logger="blog.timing"):
+        response = unlogged_client.get(
+            f"/posts/{post_with_published_location.pk}/"
+        )
+    timing = response["Server-Timing"]
+    for metric in ("db;dur=", "tpl;dur=", "view;dur=", "total;dur="):
+        assert metric in timing, (
+            "Убедитесь, что заголовок `Server-Timing` содержит время"
+            " запросов к БД, отрисовки шаблонов и работы представления."
+        )
+    records = [
+        json.loads(record.getMessage()) for record in caplog.records
+        if record.name == "blog.timing"
+    ]
+    assert len(records) == 1
+    assert records[0]["view"] == "blog:post_detail"
+    assert records[0]["queries"] > 0
+    assert records[0]["template_ms"] > 0
+
+
+def test_only_blog_and_pages_views_are_logged(
+        admin_client: Client, caplog
+):
+    with caplog.at_level(logging.INFO, logger="blog.timing"):
+        response = admin_client.get("/admin/")
+        admin_client.get("/pages/about/")
+    assert "Server-Timing" in response
+    assert [
+        json.loads(record.getMessage())["view"]
+        for record in caplog.records if record.name == "blog.timing"
+    ] == ["pages:about"]
+
+
+def test_sampling_can_turn_timing_off(
+        settings, unlogged_client: Client, caplog
+):
+    settings.BLOG_TIMING_SAMPLE_RATE = 0
+    with caplog.at_level(logging.INFO, logger="blog.timing"):
+        response = unlogged_client.get("/")
+    assert "Server-Timing" not in response
+    assert not caplog.records
+
+
+def test_unsampled_requests_run_without_query_wrapper(
+        settings, monkeypatch, unlogged_client: Client
+):
+    settings.BLOG_TIMING_SAMPLE_RATE = 0
+    settings.BLOG_DUPLICATE_QUERY_THRESHOLD = None
+    wrapped = []
+    monkeypatch.setattr(
+        middleware.QueryStats, "__call__",
+        lambda self, execute, *args: wrapped.append(args) or execute(*args)
+    )
+    assert unlogged_client.get("/").status_code == 200
+    assert not wrapped, (
+        "Убедитесь, что запросы вне выборки выполняются без обёрток"
+        " вокруг SQL-запросов."
+    )
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from mixer.backend.django import Mixer
+
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def content(mixer: Mixer, post_with_published_location):
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    return post_with_published_location
+
+
+def export(tmp_path):
+    path = tmp_path / "content.ndjson"
+    call_command("export_content", output=str(path))
+    return path
+
+
+def clear():
+    for model in (Comment, Post, Category, Location):
+        model.objects.all().delete()
+    get_user_model().objects.all().delete()
+
+
+def test_export_import_round_trip(content, tmp_path):
+    path = export(tmp_path)
+    expected = Post.objects.values().get(pk=content.pk)
+    clear()
+    call_command("import_content", str(path), batch_size=2)
+    assert Post.objects.values().get(pk=content.pk) == expected, (
+        "Убедитесь, что после выгрузки и загрузки публикация совпадает с"
+        " исходной, включая даты."
+    )
+    assert Comment.objects.filter(post=content).count() == 3
+
+
+def test_import_resolves_references_in_any_order(content, tmp_path):
+    path = export(tmp_path)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    path.write_text("\n".join(reversed(lines)) + "\n", encoding="utf-8")
+    clear()
+    call_command("import_content", str(path))
+    assert Comment.objects.filter(post=content).count() == 3
+
+
+def test_import_rejects_dangling_references(content, tmp_path):
+    path = export(tmp_path)
+    lines = [
+        line for line in path.read_text(encoding="utf-8").splitlines()
+        if json.loads(line)["model"] != "blog.post"
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    clear()
+    with pytest.raises(CommandError):
+        call_command("import_content", str(path))
+
+
+def test_import_rejects_existing_keys(content, tmp_path):
+    path = export(tmp_path)
+    clear()
+    get_user_model().objects.create(pk=content.author.pk, username="admin")
+    with pytest.raises(CommandError):
+        call_command("import_content", str(path))
+    assert not Post.objects.exists(), (
+        "Убедитесь, что загрузка не пропускает молча объекты, ключи"
+        " которых уже заняты в базе."
+    )
+
+
+def test_import_resumes_from_progress(content, tmp_path):
+    path = export(tmp_path)
+    clear()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    head = len(lines) - 2
+    partial = tmp_path / "partial.ndjson"
+    partial.write_text("\n".join(lines[:head]) + "\n", encoding="utf-8")
+    call_command("import_content", str(partial))
+    # The last imported line is replayed, as after a crash right before
+    # its progress was saved.
+    (tmp_path / "content.ndjson.progress").write_text(str(head - 1))
+    call_command("import_content", str(path), resume=True, batch_size=1)
+    assert Comment.objects.filter(post=content).count() == 3, (
+        "Убедитесь, что прерванная загрузка продолжается с сохранённого"
+        " места."
+    )
+    assert not (tmp_path / "content.ndjson.progress").exists()